@@ -13,9 +13,12 @@ import ecs
 import event
 import location
 import math_util
+import registry
+import stats
 import typ
 
 
+@registry.register
 def wander(entity: typ.Entity):
     """Take a step in a cardinal direction"""
 
@@ -43,11 +46,12 @@ def collect_all_affected_entities(source: int, target: int) -> list[int]:
 
     entities = []
 
-    for x, y in aoe.callback(pos):
-        entities += [e for e in board.entities[x][y] if e != source]
+    for x, y in location.footprint(source, aoe.callback, pos):
+        entities += [e for e in board.entities_at(x, y) if e != source]
     return entities
 
 
+@registry.register
 def lob_bomb(source: typ.Entity):
     # TODO: I could DRY this with spawn_bomb
     # TODO: we could also borrow "fire_at_player" for pathfinding
@@ -72,20 +76,14 @@ def lob_bomb(source: typ.Entity):
         return
 
 
-def place_on_unoccupied(_source: typ.Entity, spawn, count=1):
-    """pick an unoccupied random spot to spawn the given thing"""
+@registry.register
+def place_on_unoccupied(_source: typ.Entity, spawn, count=1, **constraints):
+    """pick unoccupied random spots to spawn the given thing"""
     board = ecs.get_meta().board
+    for x, y in board.free_cells(count, **constraints):
+        event.Spawn(func=partial(spawn, cmp.Position(x, y)))
 
-    floor_ents = [ent for ent, _ in ecs.Query(cmp.Cell).exclude(cmp.Wall)]
-    valid_positions = []
-    for floor_ent in floor_ents:
-        pos = esper.component_for_entity(floor_ent, cmp.Position)
-        if not board.pieces_at(pos.x,pos.y):
-           valid_positions.append(pos) 
-
-    for pos in random.choices(valid_positions, k=count):
-        event.Spawn(func=partial(spawn, pos))
-
+@registry.register
 def spider_jump(source: typ.Entity):
     player_pos = location.player_position()
 
@@ -104,11 +102,13 @@ def spider_jump(source: typ.Entity):
         return
 
 
+@registry.register
 def apply_cooldown(source: typ.Entity):
     if cd_effect := esper.try_component(source, cmp.RechargeTime):
         condition.grant(source, cmp.Condition.Cooldown, cd_effect.turns)
 
 
+@registry.register
 def apply_healing(source: typ.Entity):
     if target_cmp := esper.try_component(source, cmp.Target):
         if heal_effect := esper.try_component(source, cmp.SpellEffect.Heal):
@@ -116,6 +116,7 @@ def apply_healing(source: typ.Entity):
             event.Damage(src_frz, target_cmp.target, -1 * heal_effect.amount)
 
 
+@registry.register
 def apply_bleed(source: typ.Entity):
     if target_cmp := esper.try_component(source, cmp.Target):
         target = target_cmp.target
@@ -126,6 +127,7 @@ def apply_bleed(source: typ.Entity):
                     condition.grant(ent, cmp.Condition.Bleed, bleed_effect.value)
 
 
+@registry.register
 def apply_stun(source: typ.Entity):
     if target_cmp := esper.try_component(source, cmp.Target):
         target = target_cmp.target
@@ -136,6 +138,7 @@ def apply_stun(source: typ.Entity):
                     condition.grant(ent, cmp.Condition.Stun, stun_effect.value)
 
 
+@registry.register
 def apply_damage(source: typ.Entity):
     if target_cmp := esper.try_component(source, cmp.Target):
         target = target_cmp.target
@@ -148,6 +151,7 @@ def apply_damage(source: typ.Entity):
                     event.Damage(src_frz, ent, dmg_val)
 
 
+@registry.register
 def apply_move(source: typ.Entity):
     """move target to crosshair"""
     if move_effect := esper.try_component(source, cmp.SpellEffect.Move):
@@ -155,6 +159,7 @@ def apply_move(source: typ.Entity):
         event.Movement(move_effect.target, pos.x, pos.y)
 
 
+@registry.register
 def apply_push(source: typ.Entity):
     """move target N spaces away from source"""
     push_effect = esper.component_for_entity(source, cmp.SpellEffect.Push)
@@ -168,10 +173,8 @@ def apply_push(source: typ.Entity):
             event.Movement(entity, x, y)
             condition.grant(entity, cmp.Condition.Shunted, 1)
 
-    board = ecs.get_meta().board
-    board.build_entity_cache()
-
 
+@registry.register
 def apply_pull(source: typ.Entity):
     """move target up to source"""
     pull_effect = esper.component_for_entity(source, cmp.SpellEffect.Pull)
@@ -188,9 +191,6 @@ def apply_pull(source: typ.Entity):
             event.Movement(entity, dest.x, dest.y)
             condition.grant(entity, cmp.Condition.Shunted, 1)
 
-    board = ecs.get_meta().board
-    board.build_entity_cache()
-
 
 def _learn(spell: int):
     # TODO: probably wants to live elsewhere
@@ -201,8 +201,10 @@ def _learn(spell: int):
 
     min_slotnum = min({1, 2, 3, 4} - {k[1].slot for k in known_spells})
     esper.add_component(spell, cmp.Attuned(min_slotnum))
+    ecs.Dirty.mark(spell)
 
 
+@registry.register
 def apply_learn(source: typ.Entity):
     if learnable := esper.try_component(source, cmp.Learnable):
         spell = learnable.spell
@@ -215,6 +217,7 @@ def apply_learn(source: typ.Entity):
         condition.grant(spell, cmp.Condition.Cooldown, cd_effect.turns)
 
 
+@registry.register
 def apply_aegis(source: typ.Entity):
     if target_cmp := esper.try_component(source, cmp.Target):
         target = target_cmp.target
@@ -225,12 +228,14 @@ def apply_aegis(source: typ.Entity):
                     condition.grant(ent, cmp.Condition.Aegis, aegis_effect.value)
 
 
+@registry.register
 def die(ent: typ.Entity):
     event.Death(ent)
 
 
 def pathfind(start: cmp.Position, end: cmp.Position):
     """path[0] is start, we omit it"""
+    stats.Stats.count("path")
     board = ecs.get_meta().board
     cost = board.as_move_graph()
     graph = tcod.path.SimpleGraph(cost=cost, cardinal=1, diagonal=0)
@@ -242,6 +247,7 @@ def pathfind(start: cmp.Position, end: cmp.Position):
     return path[1:]
 
 
+@registry.register
 def follow(source: typ.Entity, steps=1):
     pos = esper.component_for_entity(source, cmp.Position)
     player_pos = location.player_last_position()
@@ -251,9 +257,10 @@ def follow(source: typ.Entity, steps=1):
             event.Movement(source, x=path[i][0], y=path[i][1])
 
 
+@registry.register
 def draw_aoe_line(source: typ.Entity):
     ppos = location.player_position()
-    callback = partial(math_util.bresenham_ray, dest=ppos.as_list)
+    callback = math_util.bresenham_ray.bind(dest=ppos.as_list)
     aura = cmp.Aura(callback=callback, color=dis.Color.RED)
     src_pos = esper.component_for_entity(source, cmp.Position)
     esper.add_component(source, aura)
@@ -261,12 +268,14 @@ def draw_aoe_line(source: typ.Entity):
     coords = math_util.bresenham_ray(origin=src_pos.as_list, dest=ppos.as_list)
     locus = cmp.Locus(coords=coords)
     esper.add_component(source, locus)
+    ecs.Dirty.mark(source)
 
 
+@registry.register
 def draw_aoe_sphere(source: typ.Entity, radius=2):
     """self-centerd sphere. at least for now"""
     src_pos = esper.component_for_entity(source, cmp.Position)
-    callback = partial(location.coords_within_radius, radius=radius)
+    callback = location.coords_within_radius.bind(radius=radius)
     aura = cmp.Aura(callback=callback, color=dis.Color.RED)
     esper.add_component(source, aura)
 
@@ -274,8 +283,10 @@ def draw_aoe_sphere(source: typ.Entity, radius=2):
     without_self = [el for el in coords if el != src_pos.as_list]
     locus = cmp.Locus(coords=without_self)
     esper.add_component(source, locus)
+    ecs.Dirty.mark(source)
 
 
+@registry.register
 def apply_dmg_along_locus(source: typ.Entity):
     src_frz = ecs.freeze_entity(source)
     dmg_effect = esper.component_for_entity(source, cmp.SpellEffect.Damage)
@@ -286,8 +297,10 @@ def apply_dmg_along_locus(source: typ.Entity):
             event.Damage(src_frz, cell, dmg_effect.amount)
     esper.remove_component(source, cmp.Locus)
     esper.remove_component(source, cmp.Aura)
+    ecs.Dirty.mark(source)
 
 
+@registry.register
 def fire_at_player(source: typ.Entity):
     # TODO: this is warlock specific, and it might not have to be
     player = ecs.Query(cmp.Player).first()
@@ -302,6 +315,7 @@ def fire_at_player(source: typ.Entity):
     esper.remove_component(source, cmp.Target)
 
 
+@registry.register
 def attack_player(source: typ.Entity):
     player = ecs.Query(cmp.Player).first()
     esper.add_component(source, cmp.Target(target=player))
@@ -309,13 +323,16 @@ def attack_player(source: typ.Entity):
     esper.remove_component(source, cmp.Target)
 
 
+@registry.register
 def aura_tick(entity: typ.Entity):
     """advance the bomb aura"""
     aura = esper.component_for_entity(entity, cmp.Aura)
     if aura.color == dis.Color.LIGHT_RED:
         aura.color = dis.Color.BLOOD_RED
+        ecs.Dirty.mark(entity)
 
 
+@registry.register
 def spawn_bomb(source: typ.Entity):
     import create
 
@@ -323,6 +340,7 @@ def spawn_bomb(source: typ.Entity):
     event.Spawn(func=partial(create.item.bomb, src_pos))
 
 
+@registry.register
 def spawn_poison_cloud(source: typ.Entity):
     import create
 
@@ -342,6 +360,7 @@ systematically:
 """
 
 
+@registry.register
 def goblin(source: typ.Entity):
     """lob bomb if we can, otherwise wander"""
 
@@ -354,6 +373,7 @@ def goblin(source: typ.Entity):
     return lob_bomb
 
 
+@registry.register
 def cyclops(source: typ.Entity):
     """if aiming fire. Otherwise, wander until you see player, then aim"""
     if esper.has_component(source, cmp.Aura):
@@ -363,6 +383,7 @@ def cyclops(source: typ.Entity):
     return wander
 
 
+@registry.register
 def bat(source: typ.Entity):
     pos = esper.component_for_entity(source, cmp.Position)
     player_pos = location.player_position()
@@ -374,6 +395,7 @@ def bat(source: typ.Entity):
     return wander
 
 
+@registry.register
 def skeleton(source: typ.Entity):
     """chase player, attack if in melee"""
     pos = esper.component_for_entity(source, cmp.Position)
@@ -390,6 +412,7 @@ def skeleton(source: typ.Entity):
     return follow
 
 
+@registry.register
 def warlock(source: typ.Entity):
     if can_see_player(source):
         if condition.has(source, cmp.Condition.Cooldown):
@@ -399,16 +422,28 @@ def warlock(source: typ.Entity):
     return wander
 
 
+@registry.register
+def run_sequence(calls: tuple, source: typ.Entity):
+    for call in calls:
+        call(source)
+
+
 def action_sequence(*args):
     """take mulitple actions"""
+    return run_sequence.bind(args)
 
-    def _seq(source: typ.Entity):
-        for call in args:
-            call(source)
 
-    return _seq
+@registry.register
+def flame_anim(source: typ.Entity):
+    player = ecs.Query(cmp.Player).first()
+    enemy_cmp = esper.component_for_entity(source, cmp.Enemy)
+    _, trace = location.trace_ray(source, player)
+    glyph = dis.Glyph.FLAME
+    path = trace[: enemy_cmp.speed]
+    event.Animation(locs=path, glyph=glyph, fg=dis.Color.ORANGE)
 
 
+@registry.register
 def living_flame(source: typ.Entity):
     pos = esper.component_for_entity(source, cmp.Position)
     player_pos = location.player_position()
@@ -423,20 +458,15 @@ def living_flame(source: typ.Entity):
     if dist_to_player == 1:
         return attack_player
 
-    def flame_anim(_):
-        player = ecs.Query(cmp.Player).first()
-        _, trace = location.trace_ray(source, player)
-        glyph = dis.Glyph.FLAME
-        path = trace[: enemy_cmp.speed]
-        event.Animation(locs=path, glyph=glyph, fg=dis.Color.ORANGE)
-
-    return action_sequence(flame_anim, partial(follow, steps=2))
+    return action_sequence(flame_anim, follow.bind(steps=2))
 
 
+@registry.register
 def bomb(_: typ.Entity):
     return aura_tick
 
 
+@registry.register
 def spider(source: typ.Entity):
     """as is, its very hard to disengage without teleport. cooldown?"""
     if esper.has_component(source, cmp.Aura):
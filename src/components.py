@@ -21,6 +21,7 @@ class GameMeta:
     context: tcod.context.Context
     console: tcod.console.Console
     process: None = None
+    turn: int = 0  # upkeeps since launch, for replays to seek by
 
 
 @component
@@ -29,6 +30,8 @@ class MapInfo:
     depth: int
     wall_glyph: int
     bwall_glyph: int
+    stats: object = None  # location.LevelStats
+    palette: object = None  # math_util.AliasTable over mood, for tinting
 
 
 @component
@@ -186,9 +189,7 @@ class MainMenu:
 
 @component
 class GameOverMenu:
-    import phase
-
-    prev = phase.Ontology.main_menu
+    prev = "main_menu"  # a phase.Ontology name, phase imports us
 
 
 @component
@@ -200,9 +201,7 @@ class InventoryMenu:
 class StartMenu:
     """Indicates an element of the start menu"""
 
-    import phase
-
-    prev = phase.Ontology.main_menu
+    prev = "main_menu"
 
 
 @component
@@ -4,6 +4,7 @@ import esper
 
 import components as cmp
 import display as dis
+import ecs
 import event
 
 
@@ -19,6 +20,7 @@ def grant(entity: int, cnd_typ: type["cmp.Condition.Type"], value: int):
         esper.add_component(entity, cnd_typ(value=0))
     cnd = esper.component_for_entity(entity, cnd_typ)
     cnd.value += value
+    ecs.Dirty.mark(entity)
 
 
 def get_val(entity: int, cnd_typ: type["cmp.Condition.Type"]) -> int:
@@ -32,7 +34,6 @@ def apply(entity: int, cnd: type["cmp.Condition.Type"]):
         case cmp.Condition.Bleed:
             pos = esper.component_for_entity(entity, cmp.Position)
             event.Animation([pos.as_list], fg=dis.Color.BLOOD_RED)
-            event.redraw()  # update screen before we apply anims
 
             bleed_src = {cmp.KnownAs: cmp.KnownAs(name="bleed")}
             # TODO: maybe a single global "bleed" entity for dmg src
@@ -42,7 +43,6 @@ def apply(entity: int, cnd: type["cmp.Condition.Type"]):
             event.Animation([pos.as_list], fg=dis.Color.CYAN)
         case cmp.Condition.Shunted:
             pos = esper.component_for_entity(entity, cmp.Position)
-            event.redraw()  # redraw so we recolor the new glyph
             event.Animation(locs=[pos.as_list], fg=dis.Color.ORANGE)
         case cmp.Condition.Dying:
             if cnd.value == 1:
@@ -1,5 +1,3 @@
-from functools import partial
-
 import esper
 
 import behavior
@@ -10,6 +8,7 @@ import ecs
 import location
 import phase
 import processors
+import registry
 
 from . import spell as create_spell
 
@@ -56,6 +55,11 @@ def scroll(pos: cmp.Position | None = None, spell: int | None = None) -> int:
     return scroll
 
 
+@registry.register
+def resolve_damage(_):
+    phase.oneshot(processors.Damage)
+
+
 def bomb(pos: cmp.Position) -> int:
     cmps = []
     cmps.append(pos)
@@ -63,13 +67,13 @@ def bomb(pos: cmp.Position) -> int:
     cmps.append(cmp.Health(max=1))
     cmps.append(cmp.KnownAs(name="bomb"))
     cmps.append(cmp.Enemy(evaluate=behavior.bomb))
-    callback = partial(location.coords_within_radius, radius=1)
+    callback = location.coords_within_radius.bind(radius=1)
     cmps.append(cmp.EffectArea(callback))
 
     cmps.append(cmp.Aura(callback=callback, color=dis.Color.LIGHT_RED))
 
-    dmg_proc = lambda _: phase.oneshot(processors.Damage)
-    cmps.append(cmp.DeathTrigger(callbacks=[behavior.apply_damage, dmg_proc]))
+    callbacks = [behavior.apply_damage, resolve_damage]
+    cmps.append(cmp.DeathTrigger(callbacks=callbacks))
 
     bomb_ent = esper.create_entity(*cmps)
     dmg = cmp.SpellEffect.Damage(source=bomb_ent, amount=10)
@@ -158,7 +162,7 @@ def flare_charge(pos: cmp.Position | None = None) -> int:
     cmps.append(cmp.Collectable())
     cmps.append(pos)
 
-    callback = partial(behavior.place_on_unoccupied, spawn=sensor, count=3)
+    callback = behavior.place_on_unoccupied.bind(spawn=sensor, count=3)
     cmps.append(cmp.UseTrigger(callbacks=[callback]))
     return esper.create_entity(*cmps)
 
@@ -1,6 +1,5 @@
 import random
 import string
-from functools import partial
 
 import esper
 
@@ -47,7 +46,7 @@ class ProcGen:
     @classmethod
     def make_area_effect(cls, power_budget: int):
         radius = max(1, power_budget // 5)
-        callback = partial(location.coords_within_radius, radius=radius)
+        callback = location.coords_within_radius.bind(radius=radius)
         return cmp.EffectArea(callback)
 
     @classmethod
@@ -107,7 +106,7 @@ def firebolt(level=1, name="Firebolt") -> int:
     cmps.append(cmp.Spell(target_range=5))
     cmps.append(cmp.RechargeTime(turns=1))
     cmps.append(cmp.SpellEffect.Damage(amount=1 + level, die_type=6, source=player))
-    callback = partial(location.coords_within_radius, radius=1)
+    callback = location.coords_within_radius.bind(radius=1)
     cmps.append(cmp.EffectArea(callback))
     cmps.append(cmp.KnownAs(name=name))
 
@@ -121,9 +120,7 @@ def lighting(level=1, name="Lighting") -> int:
     cmps.append(cmp.RechargeTime(turns=5))
     cmps.append(cmp.SpellEffect.Damage(amount=4 + level, die_type=6, source=player))
 
-    player_pos = location.player_position()
-    callback = partial(location.coords_line_to_point, player_pos)
-    cmps.append(cmp.EffectArea(callback))
+    cmps.append(cmp.EffectArea(location.coords_line_from_player))
     cmps.append(cmp.KnownAs(name=name))
 
     return esper.create_entity(*cmps)
@@ -212,7 +209,7 @@ def flare(level=1, name="Flare") -> int:
     cmps.append(cmp.RechargeTime(turns=5))
     cmps.append(cmp.KnownAs(name=name))
 
-    callback = partial(behavior.place_on_unoccupied, spawn=sensor, count=level+2)
+    callback = behavior.place_on_unoccupied.bind(spawn=sensor, count=level + 2)
     cmps.append(cmp.UseTrigger(callbacks=[callback]))
 
     return esper.create_entity(*cmps)
@@ -4,7 +4,7 @@ import components as cmp
 import display as dis
 import ecs
 import location
-import math_util
+import registry
 
 
 def floor(x: int, y: int) -> int:
@@ -18,7 +18,7 @@ def floor(x: int, y: int) -> int:
 
 def wall(x: int, y: int, breakable: int = False) -> int:
     map_info = ecs.Query(cmp.GameMeta).cmp(cmp.MapInfo)
-    color = math_util.rand_from_table(map_info.mood)
+    color = map_info.palette.draw()
     glyph = map_info.wall_glyph
 
     cmps = []
@@ -41,7 +41,7 @@ def wall(x: int, y: int, breakable: int = False) -> int:
 
 def door(x: int, y: int) -> int:
     map_info = ecs.Query(cmp.GameMeta).cmp(cmp.MapInfo)
-    color = math_util.rand_from_table(map_info.mood)
+    color = map_info.palette.draw()
 
     cmps = []
     cmps.append(cmp.Visible(glyph=dis.Glyph.CDOOR, color=color))
@@ -57,18 +57,20 @@ def door(x: int, y: int) -> int:
     return cell
 
 
-def stairs(x: int, y: int) -> int:
-    def descend(_):
-        player = ecs.Query(cmp.Player).first()
-        if target_cmp := esper.try_component(stairs, cmp.Target):
-            if target_cmp.target == player:
-                location.new_map()
+@registry.register
+def descend(stairs: int):
+    player = ecs.Query(cmp.Player).first()
+    if target_cmp := esper.try_component(stairs, cmp.Target):
+        if target_cmp.target == player:
+            location.new_map()
+
 
+def stairs(x: int, y: int) -> int:
     cmps = []
     cmps.append(cmp.Visible(glyph=dis.Glyph.STAIRS, color=dis.Color.LGREY))
 
     cmps.append(cmp.Position(x, y))
     cmps.append(cmp.StepTrigger(callbacks=[descend]))
 
-    stairs = esper.create_entity(*cmps)
-    return stairs
+    cell = esper.create_entity(*cmps)
+    return cell
@@ -6,21 +6,38 @@ import ecs
 import location
 import phase
 import event
+import input
+import registry
+import save
 
 
 def start_game():
     location.new_map()
     create.player.starting_inventory()
+    _replace_first_opt(go_to.bind(phase.Ontology.level), "Continue")
 
+
+@registry.register
+def resume_game(_):
+    """pick up the saved run"""
+    save.load()
+    _replace_first_opt(go_to.bind(phase.Ontology.level), "Continue")
+    phase.change_to(phase.Ontology.level)
+
+
+@registry.register
+def go_to(next_phase: "phase.Ontology", _):
+    phase.change_to(next_phase)
+
+
+def _replace_first_opt(callback, name):
     order0 = lambda x: x.order == 0
     all_main_menu_opts = ecs.Query(cmp.MainMenu, cmp.MenuItem)
     first_main_menu_opt = all_main_menu_opts.where(cmp.MenuItem, order0).first()
 
     # esper.remove_component(first_main_menu_opt, cmp.MainMenu)
     esper.delete_entity(first_main_menu_opt, True)
-
-    callback = lambda _: phase.change_to(phase.Ontology.level)
-    _make_menuitem(cmp.MainMenu, callback, "Continue", 0)
+    _make_menuitem(cmp.MainMenu, callback, name, 0)
 
 
 def end_game():
@@ -31,16 +48,17 @@ def end_game():
     for dd in [old_map, old_inv, old_spells]:
         for to_del, _ in dd:
             esper.delete_entity(to_del, immediate=True)
+    game_meta = ecs.Query(cmp.GameMeta).first()
+    if esper.has_component(game_meta, cmp.MapInfo):
+        esper.remove_component(game_meta, cmp.MapInfo)  # the next run starts at 1
+    location.Levels.clear()
 
-    order0 = lambda x: x.order == 0
-    all_main_menu_opts = ecs.Query(cmp.MainMenu, cmp.MenuItem)
-    first_main_menu_opt = all_main_menu_opts.where(cmp.MenuItem, order0).first()
-
-    esper.delete_entity(first_main_menu_opt, True)
     event.Log.clear()
+    input.Commands.clear()
+    save.delete()
 
-    callback = lambda _: phase.change_to(phase.Ontology.char_select)
-    _make_menuitem(cmp.MainMenu, callback, "Start Game", 0)
+    callback = go_to.bind(phase.Ontology.char_select)
+    _replace_first_opt(callback, "Start Game")
 
 
 def _make_menuitem(menu_cmp, callback, name, order):
@@ -53,36 +71,39 @@ def _make_menuitem(menu_cmp, callback, name, order):
 
 
 def main_menu_opts():
-    callback = lambda _: phase.change_to(phase.Ontology.char_select)
-    _make_menuitem(cmp.MainMenu, callback, "Start Game", 0)
-    callback = lambda _: phase.change_to(phase.Ontology.options)
+    if save.exists():
+        _make_menuitem(cmp.MainMenu, resume_game, "Continue", 0)
+    else:
+        callback = go_to.bind(phase.Ontology.char_select)
+        _make_menuitem(cmp.MainMenu, callback, "Start Game", 0)
+    callback = go_to.bind(phase.Ontology.options)
     _make_menuitem(cmp.MainMenu, callback, "Options", 1)
-    callback = lambda _: phase.change_to(phase.Ontology.about)
+    callback = go_to.bind(phase.Ontology.about)
     _make_menuitem(cmp.MainMenu, callback, "About", 2)
+    _make_menuitem(cmp.MainMenu, quit_game, "Quit", 3)
+
 
-    def exit(_):
-        raise SystemExit()
+@registry.register
+def quit_game(_):
+    raise SystemExit()
 
-    _make_menuitem(cmp.MainMenu, exit, "Quit", 3)
+
+@registry.register
+def pick_discipline(create_player, _):
+    create_player()
+    start_game()
+    phase.change_to(phase.Ontology.level)
 
 
 def discipline_opts():
     # TODO: does this wanna live here?
     # can we generate the desc string?
 
-    def make_picker(create_player):
-        def picker(_):
-            create_player()
-            start_game()
-            phase.change_to(phase.Ontology.level)
-
-        return picker
-
-    pick_adept = make_picker(create.player.adept)
-    pick_bloodmage = make_picker(create.player.bloodmage)
-    pick_terramancer = make_picker(create.player.terramancer)
-    pick_stormcaller = make_picker(create.player.stormcaller)
-    pick_luminary = make_picker(create.player.luminary)
+    pick_adept = pick_discipline.bind(create.player.adept)
+    pick_bloodmage = pick_discipline.bind(create.player.bloodmage)
+    pick_terramancer = pick_discipline.bind(create.player.terramancer)
+    pick_stormcaller = pick_discipline.bind(create.player.stormcaller)
+    pick_luminary = pick_discipline.bind(create.player.luminary)
 
     opts = [
         (pick_adept, "Adept (80hp/blink/firebolt)"),
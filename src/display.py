@@ -1,12 +1,16 @@
+import hashlib
 import itertools
+import os
 import random
 import string
 from enum import IntEnum
 
+import numpy as np
 import tcod
 
 import typ
 import ecs
+import stats
 
 CONSOLE_WIDTH = 1920
 CONSOLE_HEIGHT = 1080
@@ -23,16 +27,21 @@ PANEL_IHEIGHT = PANEL_HEIGHT - 2
 
 BOARD_HEIGHT = 64
 BOARD_WIDTH = 64
+# how much of the board fits on screen between the panels
+VIEW_WIDTH = 64
+VIEW_HEIGHT = 64
+
+CACHE_DIR = ".cache"
 
 
 R_PANEL_START = (CONSOLE_WIDTH // TILE_SIZE) - PANEL_WIDTH
-CENTER_W = PANEL_WIDTH + (BOARD_WIDTH // 2)
-CENTER_H = BOARD_HEIGHT // 2
+CENTER_W = PANEL_WIDTH + (VIEW_WIDTH // 2)
+CENTER_H = VIEW_HEIGHT // 2
 
 BOARD_STARTX = PANEL_WIDTH
 BOARD_ENDX = R_PANEL_START
 BOARD_STARTY = 0
-BOARD_ENDY = BOARD_STARTY + BOARD_HEIGHT
+BOARD_ENDY = BOARD_STARTY + VIEW_HEIGHT
 
 
 def fullscreen_toggle():
@@ -223,7 +232,37 @@ def darker(color: typ.RGB, factor: float = 0.75) -> typ.RGB:
 
 
 def load_tileset(atlas_path: str, width: int, height: int) -> tcod.tileset.Tileset:
+    """the processed tileset is cached on disk, keyed by its inputs"""
     font_atlas = "assets/Cheepicus_8x8x2.png"
+    key = hashlib.sha256()
+    for path in (atlas_path, font_atlas):
+        with open(path, "rb") as f:
+            key.update(f.read())
+    key.update(repr((width, height, [(g.name, g.value) for g in Glyph])).encode())
+    cache_path = os.path.join(CACHE_DIR, f"tileset-{key.hexdigest()[:16]}.npz")
+
+    if os.path.exists(cache_path):
+        try:
+            return _cached_tileset(cache_path)
+        except (OSError, ValueError, KeyError):
+            pass  # unreadable, rebuild it
+
+    tileset = _build_tileset(atlas_path, font_atlas, width, height)
+    try:
+        _cache_tileset(tileset, cache_path)
+    except OSError:
+        pass  # read only install, just build it every launch
+    return tileset
+
+
+def _tileset_codepoints() -> list[int]:
+    """every codepoint _build_tileset assigns"""
+    codepoints = [ord(char) for char in string.printable + "┌─┐│ └─┘├┤"]
+    codepoints += range(ord("z") + 1, ord("z") + 1 + len(Glyph))
+    return list(dict.fromkeys(codepoints))
+
+
+def _build_tileset(atlas_path: str, font_atlas: str, width: int, height: int):
     font_ts = tcod.tileset.load_tilesheet(
         font_atlas, 16, 16, tcod.tileset.CHARMAP_CP437
     )
@@ -245,6 +284,63 @@ def load_tileset(atlas_path: str, width: int, height: int) -> tcod.tileset.Tiles
     return tileset
 
 
+def _cache_tileset(tileset: tcod.tileset.Tileset, cache_path: str):
+    codepoints = _tileset_codepoints()
+    tiles = np.stack([tileset.get_tile(cp) for cp in codepoints])
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.savez(cache_path, codepoints=np.array(codepoints), tiles=tiles)
+
+
+def _cached_tileset(cache_path: str) -> tcod.tileset.Tileset:
+    with np.load(cache_path) as cached:
+        codepoints, tiles = cached["codepoints"], cached["tiles"]
+    tileset = tcod.tileset.Tileset(tiles.shape[2], tiles.shape[1])
+    for codepoint, tile in zip(codepoints.tolist(), tiles):
+        tileset.set_tile(codepoint, tile)
+    return tileset
+
+
+class Assets:
+    """files read from disk once, then served from memory"""
+
+    consoles: dict[str, tcod.console.Console] = {}
+
+    @classmethod
+    def xp(cls, path: str) -> tcod.console.Console:
+        """a REXPaint console. it's shared, so blit it rather than draw on it"""
+        if path not in cls.consoles:
+            (cls.consoles[path],) = tcod.console.load_xp(path, order="F")
+        return cls.consoles[path]
+
+
+class Frames:
+    """
+    double buffered presents. renders publish a copy of the console and carry on,
+    the newest copy only goes to the screen, and waits on vsync, when the game idles
+    """
+
+    present = None  # the context's own present
+    front: tcod.console.Console | None = None
+    pending = False
+
+    @classmethod
+    def publish(cls, console: tcod.console.Console, **kwargs):
+        """stands in for context.present"""
+        if cls.front is None or cls.front.rgb.shape != console.rgb.shape:
+            cls.front = tcod.console.Console(*console.rgb.shape, order="F")
+        cls.front.rgb[:] = console.rgb
+        cls.pending = True
+
+    @classmethod
+    def flush(cls, again: bool = False):
+        """show the newest frame, `again` even if it's already on screen"""
+        if cls.front is None or not (cls.pending or again):
+            return
+        cls.pending = False
+        cls.present(cls.front)
+        stats.Stats.frame()
+
+
 def remap_glyphs():
     codepath = itertools.count(ord("z") + 1)
     glyph_map = {glyph.name: next(codepath) for glyph in Glyph}
@@ -252,12 +348,61 @@ def remap_glyphs():
     return IntEnum("Glyph", glyph_map)
 
 
+class Camera:
+    """the part of the board that's on screen. it follows the player around"""
+
+    x = 0  # board coords of the view's top left
+    y = 0
+    board_width = BOARD_WIDTH  # of the board followed last
+    board_height = BOARD_HEIGHT
+
+    @classmethod
+    def size(cls) -> tuple[int, int]:
+        return min(VIEW_WIDTH, cls.board_width), min(VIEW_HEIGHT, cls.board_height)
+
+    @classmethod
+    def follow(cls, x: int, y: int, board_width: int, board_height: int):
+        """center on x, y, short of scrolling past the edge of the board"""
+        cls.board_width, cls.board_height = board_width, board_height
+        width, height = cls.size()
+        cls.x = max(0, min(x - width // 2, board_width - width))
+        cls.y = max(0, min(y - height // 2, board_height - height))
+
+    @classmethod
+    def area(cls) -> tuple[slice, slice]:
+        """the board slices on screen"""
+        width, height = cls.size()
+        return slice(cls.x, cls.x + width), slice(cls.y, cls.y + height)
+
+    @classmethod
+    def origin(cls) -> tuple[int, int]:
+        """console coords of the view's top left. boards smaller than it sit centered"""
+        width, height = cls.size()
+        x = BOARD_STARTX + (VIEW_WIDTH - width) // 2
+        y = BOARD_STARTY + (VIEW_HEIGHT - height) // 2
+        return x, y
+
+    @classmethod
+    def local(cls, x: int, y: int) -> tuple[int, int] | None:
+        """board coords to view coords, None when off screen"""
+        width, height = cls.size()
+        x, y = x - cls.x, y - cls.y
+        if 0 <= x < width and 0 <= y < height:
+            return x, y
+        return None
+
+    @classmethod
+    def to_screen(cls, x: int, y: int) -> tuple[int, int] | None:
+        if (view := cls.local(x, y)) is None:
+            return None
+        origin_x, origin_y = cls.origin()
+        return origin_x + view[0], origin_y + view[1]
+
+
 def write_rgbs(console: tcod.console.Console, cell_rgbs):
-    half = len(cell_rgbs) // 2
-    startx, endx = CENTER_W - half, CENTER_W + half
-    starty, endy = CENTER_H - half, CENTER_H + half
-    console.rgb[startx:endx, starty:endy] = cell_rgbs
-    # TODO if the magnification/dimentions change, the above line breaks
+    """draw the on screen cells, as laid out by Camera"""
+    x, y = Camera.origin()
+    console.rgb[x : x + len(cell_rgbs), y : y + len(cell_rgbs[0])] = cell_rgbs
 
 
 def colored_text(text: str, color: typ.RGB) -> str:
@@ -1,8 +1,14 @@
 # ECS funcs to extend esper
+import itertools
+import pickle
+from collections import defaultdict
 from collections.abc import Generator
 
 import esper
+import numpy as np
+
 import components as cmp
+import stats
 
 cmps = esper._entities
 
@@ -16,6 +22,7 @@ class Query:
             self.filter(*include)
 
     def filter(self, *include):
+        stats.Stats.queries += 1
         cmp_db = esper._components
         self.include = include
         if cmp_sets := [cmp_db[cmp] for cmp in include if cmp in cmp_db]:
@@ -80,6 +87,33 @@ class Query:
         raise KeyError
 
 
+class Dirty:
+    """
+    what changed since the last autosave, so only that gets pickled again
+    edits in place have to be marked, new entities are found by their ids
+    """
+
+    entities: set[int] = set()
+    meta: set[str] = set()
+    everything = True  # a new or replaced world, nothing to diff against
+
+    @classmethod
+    def mark(cls, *entities: int):
+        cls.entities.update(entities)
+
+    @classmethod
+    def mark_meta(cls, *keys: str):
+        cls.meta.update(keys)
+
+    @classmethod
+    def mark_all(cls):
+        cls.everything = True
+
+    @classmethod
+    def clear(cls):
+        cls.entities, cls.meta, cls.everything = set(), set(), False
+
+
 def freeze_entity(source: int):
     """save an entity to a type:component dict"""
     components = esper.components_for_entity(source)
@@ -90,3 +124,148 @@ def freeze_entity(source: int):
 def get_meta():
     game_meta = Query(cmp.GameMeta).val
     return game_meta
+
+
+def next_entity() -> int:
+    """the id esper hands out next, without using it up"""
+    upcoming = next(esper._entity_count)
+    esper._entity_count = itertools.count(upcoming)
+    return upcoming
+
+
+def unused_entity() -> int:
+    """the lowest id past every entity, live or parked with a level we've left"""
+    import location  # it imports us
+
+    return max(next_entity(), location.Levels.top + 1)
+
+
+def _pack_column(values: list):
+    """plain int columns become numpy blocks, anything else stays a list"""
+    if all(type(v) is int for v in values):
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    return values
+
+
+def pack(entities: set[int]) -> list:
+    """
+    the components of some entities, packed per type and field, not per entity
+    GameMeta holds the session's context, so it always stays out
+    """
+    table = esper._entities
+    packed = []
+    for cmp_type, ids in esper._components.items():
+        if cmp_type is cmp.GameMeta:
+            continue
+        # instances of a type nearly always share their field names
+        groups = defaultdict(lambda: ([], []))
+        for entity in ids & entities:
+            fields = vars(table[entity][cmp_type])
+            group_ids, group_fields = groups[tuple(fields)]
+            group_ids.append(entity)
+            group_fields.append(fields)
+        for keys, (group_ids, group_fields) in groups.items():
+            columns = [_pack_column([f[key] for f in group_fields]) for key in keys]
+            packed.append((cmp_type, keys, np.array(group_ids, np.int32), columns))
+    return packed
+
+
+def unpack(packed: list):
+    """recreate packed components, under the entity ids they were packed with"""
+    entities = esper._entities
+    for cmp_type, keys, ids, columns in packed:
+        columns = [c.tolist() if isinstance(c, np.ndarray) else c for c in columns]
+        ids = ids.tolist()
+        rows = zip(*columns) if columns else itertools.repeat(())
+        for entity, row in zip(ids, rows):
+            instance = object.__new__(cmp_type)
+            instance.__dict__ = dict(zip(keys, row))
+            if entity in entities:
+                entities[entity][cmp_type] = instance
+            else:
+                entities[entity] = {cmp_type: instance}
+        esper._components.setdefault(cmp_type, set()).update(ids)
+    esper.clear_cache()
+
+
+def static_cells() -> set[int]:
+    """cells that never change in place. replacing one makes a new entity"""
+    cmp_db = esper._components
+    mutable = cmp_db.get(cmp.Health, set()) | cmp_db.get(cmp.Door, set())
+    return cmp_db.get(cmp.Cell, set()) - mutable
+
+
+class StaticCells:
+    """
+    most of a level is plain cells, and only Board.set_cell replaces those
+    so they're packed once per board and revision, and a restore onto the
+    same board and revision keeps the live ones instead of rebuilding them
+    """
+
+    key: tuple | None = None
+    packed: bytes = b""
+
+    @classmethod
+    def pack(cls, board) -> tuple[tuple, bytes]:
+        key = (board.serial, board.revision)
+        if cls.key != key:
+            packed = pack(static_cells())
+            cls.packed = pickle.dumps(packed, protocol=pickle.HIGHEST_PROTOCOL)
+            cls.key = key
+        return key, cls.packed
+
+
+def snapshot() -> bytes:
+    """
+    the whole world plus board as one compact buffer, for undo or lookahead
+    GameMeta holds the session's context, so it stays out and is reattached
+    """
+    board = get_meta().board
+    board_key, cells = StaticCells.pack(board)
+    rest = esper._entities.keys() - esper._dead_entities - static_cells()
+    state = {
+        "board": board_key,
+        "static": cells,
+        "components": pack(rest),
+        "cells": board.cell_ids(),
+        "explored": board.explored,
+        "remembered": board.remembered,
+        "entity_cache": board.entity_cache(),
+        "next_entity": unused_entity(),
+    }
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restore(buffer: bytes):
+    """replace the world with a snapshot, keeping the live GameMeta"""
+    state = pickle.loads(buffer)
+    meta_entity = Query(cmp.GameMeta).first()
+    game_meta = esper.component_for_entity(meta_entity, cmp.GameMeta)
+    board = game_meta.board
+
+    if state["board"] == (board.serial, board.revision):
+        # the same plain cells are still there, only the rest is replaced
+        for entity in esper._entities.keys() - static_cells() - {meta_entity}:
+            esper.delete_entity(entity, immediate=True)
+        esper._dead_entities.clear()
+        unpack(state["components"])
+    else:
+        esper._entities.clear()  # cleared in place, cmps above refers to it
+        esper._components.clear()
+        esper._dead_entities.clear()
+        unpack(pickle.loads(state["static"]))
+        unpack(state["components"])
+        esper._entities.setdefault(meta_entity, {})[cmp.GameMeta] = game_meta
+        esper._components[cmp.GameMeta] = {meta_entity}
+
+        board = type(board)(*state["cells"].shape)
+        board.load_cells(state["cells"])
+        game_meta.board = board
+    esper._entity_count = itertools.count(state["next_entity"])
+
+    board.explored, board.remembered = state["explored"], state["remembered"]
+    board.load_entity_cache(state["entity_cache"])
+    Dirty.mark_all()
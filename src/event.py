@@ -1,6 +1,10 @@
 import collections
+import queue
 import re
+import sys
+import threading
 from dataclasses import dataclass
+from functools import lru_cache
 import typing
 
 import esper
@@ -9,6 +13,7 @@ import typ
 
 import components as cmp
 import display as dis
+import ecs
 import processors
 import phase
 import behavior
@@ -32,12 +37,58 @@ RE_COLOR_CODES = re.compile(
 )
 
 
+@lru_cache(maxsize=512)
+def measure(text: str) -> tuple[str, int]:
+    """a message without color codes, and how many panel lines it wraps to"""
+    clean_text = RE_COLOR_CODES.sub(repl="", string=text)
+    ghr = tcod.console.get_height_rect
+    return clean_text, ghr(width=dis.PANEL_IWIDTH, string=clean_text)
+
+
+class Echo:
+    """
+    copies log lines to stdout from a background thread
+    so a busy turn never waits on the terminal
+    """
+
+    lines: queue.Queue = queue.Queue()
+    thread: threading.Thread | None = None
+    out: typing.TextIO = sys.stdout
+
+    @classmethod
+    def put(cls, text: str):
+        if cls.thread is None or not cls.thread.is_alive():
+            cls.thread = threading.Thread(target=cls._run, daemon=True)
+            cls.thread.start()
+        cls.lines.put(text)
+
+    @classmethod
+    def flush(cls):
+        if cls.thread is not None and cls.thread.is_alive():
+            cls.lines.join()
+
+    @classmethod
+    def _run(cls):
+        while True:
+            text = cls.lines.get()
+            try:
+                cls.out.write(f"{text}\n")
+            finally:
+                cls.lines.task_done()
+
+
 class Log:
     """Messages to be displayed in in-game log"""
 
-    messages: list = []
+    messages: collections.deque = collections.deque()  # (text, lines)
     max_len = dis.PANEL_IHEIGHT
     curr_len = 0
+    panel: tcod.console.Console | None = None
+    stale = True  # panel needs redrawing
+    # damage this turn, merged per (source, target name, heals) until the next flush
+    pending: dict[tuple[str, str, bool], list[int]] = {}
+    last = ""  # most recent plain message, and how often it's repeated
+    repeats = 0
 
     @classmethod
     def color_fmt(cls, entity: typ.Entity):
@@ -50,23 +101,81 @@ class Log:
 
     @classmethod
     def append(cls, text: str):
-        clean_text = RE_COLOR_CODES.sub(repl="", string=text)
-        print(clean_text)
+        cls.flush()
+        if text == cls.last:
+            # "can't move there" spam collapses into one counted line
+            cls.repeats += 1
+            cls.curr_len -= cls.messages.pop()[1]
+            cls._add(f"{text} x{cls.repeats}")
+            return
+        cls.last, cls.repeats = text, 1
+        cls._add(text, echo=True)
+
+    @classmethod
+    def tally(cls, source: str, target: str, amount: int):
+        """damage (or healing, when negative) to log, merged with the rest of the turn"""
+        key = (source, target, amount < 0)
+        cls.pending.setdefault(key, []).append(abs(amount))
 
-        ghr = tcod.console.get_height_rect
-        lines = ghr(width=dis.PANEL_IWIDTH, string=clean_text)
+    @classmethod
+    def flush(cls):
+        """write out the merged damage lines"""
+        pending, cls.pending = cls.pending, {}
+        for (source, target, heals), amounts in pending.items():
+            if len(amounts) > 1:
+                target = f"{len(amounts)}x {target}"
+            total = sum(amounts)
+            each = ""
+            if len(amounts) > 1 and len(set(amounts)) == 1:
+                total, each = amounts[0], " each"
+
+            if heals:
+                amount = dis.colored_text(total, dis.Color.GREEN)
+                text = f"{source} heals {target} for {amount}{each}"
+            else:
+                amount = dis.colored_text(total, dis.Color.RED)
+                text = f"{source} deals {amount} damage{each} to {target}"
+            cls.last = ""
+            cls._add(text, echo=True)
 
-        cls.curr_len += lines
+    @classmethod
+    def _add(cls, text: str, echo: bool = False):
+        clean_text, lines = measure(text)
+        if echo:
+            Echo.put(clean_text)
 
+        cls.curr_len += lines
         cls.messages.append((text, lines))
         while cls.curr_len > cls.max_len:
-            cls.curr_len -= cls.messages[0][1]
-            cls.messages = cls.messages[1:]
+            cls.curr_len -= cls.messages.popleft()[1]
+        cls.stale = True
+        ecs.Dirty.mark_meta("log")
 
     @classmethod
     def clear(cls):
-        cls.curr_len = 0
-        cls.messages = []
+        cls.restore([], 0)
+
+    @classmethod
+    def restore(cls, messages, curr_len: int):
+        cls.messages = collections.deque(messages)
+        cls.curr_len = curr_len
+        cls.pending, cls.last, cls.repeats = {}, "", 0
+        cls.stale = True
+        ecs.Dirty.mark_meta("log")
+
+    @classmethod
+    def render(cls) -> tcod.console.Console:
+        """the log drawn at panel size, only redrawn after it changes"""
+        cls.flush()
+        if cls.panel is None:
+            shape = (dis.PANEL_IWIDTH, dis.PANEL_IHEIGHT)
+            cls.panel = tcod.console.Console(*shape, order="F")
+        if cls.stale:
+            cls.panel.clear()
+            message = "\n".join([m[0] for m in cls.messages])
+            cls.panel.print_box(0, 0, *cls.panel.rgb.shape, string=message)
+            cls.stale = False
+        return cls.panel
 
 
 class Queues:
@@ -109,6 +218,7 @@ class Movement(Event):
 
     def __post_init__(self):
         super().__post_init__()
+        play_animations()
         phase.oneshot(processors.Movement)
 
 
@@ -136,9 +246,13 @@ class Animation(Event):
     glyph: int | None = None
     fg: typ.RGB | None = None
     bg: typ.RGB | None = None
+    # queued up, and played together by NPCAct and Upkeep
+    # or by play_animations, before a board change would show under them
 
-    def __post_init__(self):
-        super().__post_init__()
+
+def play_animations():
+    """a trail has to be shown before the move or spawn it leads up to"""
+    if Queues.animation:
         phase.oneshot(processors.Animation)
 
 
@@ -149,6 +263,7 @@ class Spawn(Event):
 
     def __post_init__(self):
         super().__post_init__()
+        play_animations()
         phase.oneshot(processors.Spawn)
 
 
@@ -165,6 +280,7 @@ def trigger_all_callbacks(source: typ.Entity, trigger_cmp):
     # item use and spells have their own. so perhaps enemy/death
     if esper.entity_exists(source) and esper.has_component(source, cmp.Target):
         esper.remove_component(source, cmp.Target)
+        ecs.Dirty.mark(source)
 
 
 def trigger_effect_callbacks(source: typ.Entity):
@@ -187,6 +303,7 @@ def trigger_effect_callbacks(source: typ.Entity):
     # item use and spells have their own. so perhaps enemy/death
     if esper.entity_exists(source) and esper.has_component(source, cmp.Target):
         esper.remove_component(source, cmp.Target)
+        ecs.Dirty.mark(source)
 
 
 def redraw():
@@ -1,7 +1,7 @@
+import collections
 import enum
 
 import tcod
-import yaml
 
 """
 Clarifying related terms
@@ -31,9 +31,102 @@ class Input(enum.Enum):
     SKIP = enum.auto()
     ALTERNATE = enum.auto()
     FULLSCREEN = enum.auto()
+    RUN = enum.auto()
+    DEBUG = enum.auto()
+
+
+class Keyboard:
+    """where input comes from when nothing is being replayed"""
+
+    @staticmethod
+    def events():
+        return tcod.event.wait()
+
+    @staticmethod
+    def held(key: Input) -> bool:
+        return bool(tcod.event.get_keyboard_state()[keymap()[key].scancode])
+
+    @staticmethod
+    def interrupted() -> bool:
+        return Commands.take(tcod.event.get())
+
+
+class Commands:
+    """
+    keys pressed but not handled yet. a held key repeats faster than turns resolve,
+    so a repeat of a key that's already waiting is dropped
+    """
+
+    buffer: collections.deque = collections.deque()
+    max_len = 8
+    # window and quit events read outside the input loop, for it to handle
+    pending: collections.deque = collections.deque()
+    stale = False  # a board render was skipped, redraw before waiting on keys
+    # a run in progress: its direction, the enemies in view and hp when it began
+    run: tuple[int, int] | None = None
+    seen: set = set()
+    hp = 0
+    source = Keyboard  # or a replay.Playback
+    recorder = None  # replay.Recorder, notes every key and modifier the game reads
+    fast_forward = False  # replaying, nothing needs drawing
+
+    @classmethod
+    def push(cls, key: tcod.event.KeyDown):
+        if key.repeat and any(k.sym == key.sym for k in cls.buffer):
+            return
+        if len(cls.buffer) < cls.max_len:
+            cls.buffer.append(key)
+
+    @classmethod
+    def take(cls, events) -> bool:
+        """keep what was read: keys get buffered, the rest pends. True if a key"""
+        pressed = False
+        for event in events:
+            if isinstance(event, tcod.event.KeyDown):
+                cls.push(event)
+                pressed = True
+            elif isinstance(event, (tcod.event.WindowEvent, tcod.event.Quit)):
+                cls.pending.append(event)
+        return pressed
+
+    @classmethod
+    def pop(cls) -> tcod.event.KeyDown:
+        key = cls.buffer.popleft()
+        if cls.recorder:
+            cls.recorder.note("key", int(key.sym))
+        return key
+
+    @classmethod
+    def busy(cls) -> bool:
+        """the next turn's input is already decided, so nobody sees this frame"""
+        return cls.fast_forward or bool(cls.buffer) or cls.run is not None
+
+    @classmethod
+    def clear(cls):
+        cls.buffer.clear()
+        cls.pending.clear()
+        cls.run = None
+
+
+def held(key: Input) -> bool:
+    """is a modifier like ALTERNATE or RUN down"""
+    down = Commands.source.held(key)
+    if Commands.recorder:
+        Commands.recorder.note("held", down)
+    return down
+
+
+def interrupted() -> bool:
+    """was anything pressed since we last looked, without waiting for it"""
+    pressed = Commands.source.interrupted()
+    if Commands.recorder:
+        Commands.recorder.note("halt", pressed)
+    return pressed
 
 
 def load_keymap(keymap_json_path):
+    import yaml  # only needed once, keep it off the startup path
+
     with open(keymap_json_path, "r") as file:
         keymap_data = yaml.safe_load(file)
 
@@ -57,4 +150,14 @@ def load_keymap(keymap_json_path):
     return key_map
 
 
-KEYMAP = load_keymap("keymap.yaml")
+def keymap() -> dict:
+    if "KEYMAP" not in globals():
+        globals()["KEYMAP"] = load_keymap("keymap.yaml")
+    return globals()["KEYMAP"]
+
+
+def __getattr__(name):
+    """KEYMAP is read on first use rather than at import"""
+    if name == "KEYMAP":
+        return keymap()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,19 @@
 # TODO: do we store info about the board size here, or still display?
 
+import enum
+import itertools
+import multiprocessing
+import pickle
 import random
-from dataclasses import dataclass
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import cache, partial
 from typing import Callable, Iterable
 
 import esper
+import numpy as np
 import tcod
 import math
 
@@ -13,9 +22,10 @@ import create
 import display as dis
 import ecs
 import math_util
+import registry
+import stats
 import typ
 
-BOARD_MAX = dis.BOARD_WIDTH - 1
 
 
 def player_position() -> cmp.Position:
@@ -52,11 +62,13 @@ def can_see(
     return True
 
 
+@registry.register
 def coords_within_radius(pos: cmp.Position, radius: int) -> list[typ.Coord]:
+    board = ecs.get_meta().board
     min_x = max(0, pos.x - radius)
-    max_x = min(dis.BOARD_WIDTH, pos.x + radius + 1)
+    max_x = min(board.width, pos.x + radius + 1)
     min_y = max(0, pos.y - radius)
-    max_y = min(dis.BOARD_HEIGHT, pos.y + radius + 1)
+    max_y = min(board.height, pos.y + radius + 1)
 
     ret_coords = []
 
@@ -68,149 +80,566 @@ def coords_within_radius(pos: cmp.Position, radius: int) -> list[typ.Coord]:
     return ret_coords
 
 
+@registry.register
 def coords_line_to_point(source: cmp.Position, dest: cmp.Position) -> list[typ.Coord]:
     """exclude source"""
     coords = tcod.los.bresenham(source.as_tuple, dest.as_tuple)
     return list(coords)[1:]
 
 
+@registry.register
+def coords_line_from_player(dest: cmp.Position) -> list[typ.Coord]:
+    return coords_line_to_point(player_position(), dest)
+
+
+FOLLOWS_PLAYER = {coords_line_from_player}  # footprints that move with the player too
+
+
+def footprint(entity: int, callback: Callable, pos) -> list[typ.Coord]:
+    """
+    coords of an Aura or EffectArea callback, memoized per entity
+    only recomputed once pos or the board's cells change (or the player, for some)
+    """
+    board = ecs.get_meta().board
+    key = (tuple(pos), board.revision)
+    if callback in FOLLOWS_PLAYER:
+        key += player_position().as_tuple
+    cached = board.footprints.get((entity, callback))
+    if cached and cached[0] == key:
+        return cached[1]
+    stats.Stats.count("area")
+    coords = callback(pos)
+    board.footprints[entity, callback] = key, coords
+    return coords
+
+
 def backlight(x, y):
     """add a fading candle-colored illumination of the player's sight radius"""
+    bg = backlights(slice(x, x + 1), slice(y, y + 1))[0, 0]
+    return tuple(bg.tolist())
+
+
+def backlights(xs: slice, ys: slice) -> np.ndarray:
+    """backlight over an area of the board at once, as an array of rgb"""
     # we then darken the bg light by its distance from the light src player
     # we use the closes vision-holding entity, not just player
-    dist_to_light = float("inf")
-    sight_radius = 1
+    grid_x, grid_y = np.ogrid[xs, ys]
+    shape = (xs.stop - xs.start, ys.stop - ys.start)
+    dist_to_light = np.full(shape, np.inf)
+    sight_radius = np.ones(shape)
     for _, (gvis, pos) in ecs.Query(cmp.GivesVision, cmp.Position):
-        current_dist = math.dist(pos.as_tuple, (x, y))
-        if current_dist <  dist_to_light:
-            dist_to_light = current_dist
-            sight_radius = gvis.distance
+        current_dist = np.hypot(grid_x - pos.x, grid_y - pos.y)
+        closer = current_dist < dist_to_light
+        dist_to_light[closer] = current_dist[closer]
+        sight_radius[closer] = gvis.distance
 
     normalized_dist = dist_to_light / sight_radius
     interpolation_coef = 0.85  # higher is faster dropoff
     factor = 1.0 - (normalized_dist * normalized_dist * interpolation_coef)
-    bg = dis.darker(dis.Color.CANDLE, factor=factor)
-    return bg
+    # dis.darker, for every cell
+    candle = np.array([dis.linear_to_srgb(c) for c in dis.Color.CANDLE])
+    channels = np.clip(factor[..., None] * candle, 0, 1) ** 0.41666
+    return np.round(np.clip(channels * 255, 0, 255)).astype(np.uint8)
 
 
-class Board:
+class FreeCells:
     """
-    Note: the cell matrix is stored as columns, so [x][y] is the right acces pattern
+    unoccupied walkable coords, as a list plus a coord -> slot map
+    so adding, removing and picking one at random are all O(1)
     """
 
-    cells: list[list[typ.CELL]] = []
-    entities: list[list[set[typ.Entity]]] = []
-    explored: set[typ.CELL] = set()
+    def __init__(self):
+        self.coords: list[typ.Coord] = []
+        self.slots: dict[typ.Coord, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    def __contains__(self, coord: typ.Coord) -> bool:
+        return coord in self.slots
+
+    def add(self, coord: typ.Coord):
+        if coord not in self.slots:
+            self.slots[coord] = len(self.coords)
+            self.coords.append(coord)
+
+    def discard(self, coord: typ.Coord):
+        """swap the last coord into the freed slot"""
+        if (slot := self.slots.pop(coord, None)) is None:
+            return
+        last = self.coords.pop()
+        if last != coord:
+            self.coords[slot] = last
+            self.slots[last] = slot
+
+    def sample(self, count: int = 1, accept: Callable | None = None) -> list:
+        """distinct random coords, can come up short if not enough qualify"""
+        if accept is None:
+            return random.sample(self.coords, min(count, len(self.coords)))
+
+        picks = set()
+        for _ in range(count * 8 if self.coords else 0):
+            coord = random.choice(self.coords)
+            if accept(coord):
+                picks.add(coord)
+            if len(picks) == count:
+                return list(picks)
+        # too picky for guessing, so check everything once
+        valid = [c for c in self.coords if c not in picks and accept(c)]
+        return list(picks) + random.sample(valid, min(count - len(picks), len(valid)))
+
+
+CHUNK = 32  # boards are stored in CHUNK x CHUNK squares
+
+
+class Chunk:
+    """one square of a board. cells is always there, stacks only where it's busy"""
+
+    __slots__ = ("cells", "stacks")
 
     def __init__(self):
-        self.entities = [
-            [set() for _ in range(dis.BOARD_HEIGHT)]
-            for _ in range(dis.BOARD_WIDTH)
-        ]
-        self.cells = []
+        self.cells = np.zeros((CHUNK, CHUNK), dtype=np.int32)  # 0 for no cell
+        # coord -> the cell plus whatever stands on it, for coords with more than a cell
+        self.stacks: dict[typ.Coord, set[typ.Entity]] = {}
 
-    def fill(self):
-        def make_wall(x, y):
-            if x in (0, dis.BOARD_WIDTH - 1):
-                return create.tile.wall(x, y)
-            if y in (0, dis.BOARD_HEIGHT - 1):
-                return create.tile.wall(x, y)
-            return create.tile.wall(x, y, breakable=not random.randint(0, 15))
 
-        for x in range(dis.BOARD_WIDTH):
-            col = [make_wall(x, y) for y in range(dis.BOARD_HEIGHT)]
-            self.cells.append(col)
+class Board:
+    """
+    Note: cell_ids is stored as columns, so [x][y] is the right acces pattern
+    storage is chunked, so a chunk nobody wrote to costs nothing
+    """
+
+    free: FreeCells
+    serials = itertools.count()  # tells boards apart, see ecs.StaticCells
+
+    def __init__(self, width: int | None = None, height: int | None = None):
+        self.serial = next(Board.serials)
+        # new boards get the configured size, unless they're rebuilt from cells
+        self.width = dis.BOARD_WIDTH if width is None else width
+        self.height = dis.BOARD_HEIGHT if height is None else height
+        self.chunks: dict[typ.Coord, Chunk] = {}
+        self.free = FreeCells()
+        self.revision = 0  # bumped when a cell is replaced, walls may have moved
+        self.footprints: dict[tuple, tuple] = {}  # see footprint()
+        size = (self.width, self.height)
+        self.explored = np.zeros(size, dtype=bool)
+        # how each explored coord looked the last time it was in view, pieces and all
+        self.remembered = np.zeros(size, dtype=tcod.console.rgb_graphic)
 
     @classmethod
     def as_rgb(cls, cell: typ.CELL) -> typ.CELL_RGB:
         vis = esper.component_for_entity(cell, cmp.Visible)
         return (vis.glyph, vis.color, vis.bg_color)
 
-    def as_transparency(self) -> list[typ.Coord]:
-        transparency = matrix(dis.BOARD_WIDTH, dis.BOARD_HEIGHT, 1)
-
-        for x in range(dis.BOARD_WIDTH):
-            for y in range(dis.BOARD_HEIGHT):
-                is_opaque = lambda x: esper.has_component(x, cmp.Opaque)
-                if any(map(is_opaque, self.entities_at(x, y))):
-                    transparency[x][y] = 0
-
+    def _overlaps(self, x: slice, y: slice):
+        """(chunk, chunk slices, result slices) for each chunk the area touches"""
+        xs = range(*x.indices(self.width))
+        ys = range(*y.indices(self.height))
+        for cx in range(xs.start // CHUNK, (xs.stop - 1) // CHUNK + 1):
+            x0, x1 = max(xs.start, cx * CHUNK), min(xs.stop, (cx + 1) * CHUNK)
+            for cy in range(ys.start // CHUNK, (ys.stop - 1) // CHUNK + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None or x0 >= x1:
+                    continue
+                y0, y1 = max(ys.start, cy * CHUNK), min(ys.stop, (cy + 1) * CHUNK)
+                if y0 >= y1:
+                    continue
+                inner = slice(x0 - cx * CHUNK, x1 - cx * CHUNK)
+                inner = inner, slice(y0 - cy * CHUNK, y1 - cy * CHUNK)
+                outer = slice(x0 - xs.start, x1 - xs.start)
+                outer = outer, slice(y0 - ys.start, y1 - ys.start)
+                yield chunk, inner, outer
+
+    def cell_ids(self, x: slice = slice(None), y: slice = slice(None)) -> np.ndarray:
+        """the cells over an area, as an array of entity ids"""
+        xs = range(*x.indices(self.width))
+        ys = range(*y.indices(self.height))
+        ids = np.zeros((len(xs), len(ys)), dtype=np.int32)
+        for chunk, inner, outer in self._overlaps(x, y):
+            ids[outer] = chunk.cells[inner]
+        return ids
+
+    def load_cells(self, ids):
+        """fill the board from a whole board array of cell entity ids"""
+        ids = np.asarray(ids, dtype=np.int32)
+        self.chunks = {}
+        for cx in range(0, ids.shape[0], CHUNK):
+            for cy in range(0, ids.shape[1], CHUNK):
+                part = ids[cx : cx + CHUNK, cy : cy + CHUNK]
+                if not part.any():
+                    continue
+                chunk = self.chunks[cx // CHUNK, cy // CHUNK] = Chunk()
+                chunk.cells[: part.shape[0], : part.shape[1]] = part
+
+    def as_transparency(self, x: slice = slice(None), y: slice = slice(None)):
+        """1 where light passes, over the given area of the board"""
+        opaque = esper._components.get(cmp.Opaque, set())
+        opaque_ids = np.fromiter(opaque, dtype=np.int32)
+        transparency = (~np.isin(self.cell_ids(x, y), opaque_ids)).astype(np.int8)
+        x0 = x.indices(self.width)[0]
+        y0 = y.indices(self.height)[0]
+        for chunk, _, (outer_x, outer_y) in self._overlaps(x, y):
+            for (sx, sy), stack in chunk.stacks.items():
+                in_x = outer_x.start <= sx - x0 < outer_x.stop
+                if in_x and outer_y.start <= sy - y0 < outer_y.stop:
+                    if not stack.isdisjoint(opaque):
+                        transparency[sx - x0, sy - y0] = 0
         return transparency
 
-    def as_move_graph(self) -> list[typ.Coord]:
-        graph = matrix(dis.BOARD_WIDTH, dis.BOARD_HEIGHT, 1)
-
-        for x, col in enumerate(self.cells):
-            for y, _ in enumerate(col):
-                graph[x][y] = int(not (self.has_blocker(x, y)))
+    def as_move_graph(self) -> np.ndarray:
+        """1 where things can walk, 0 where something Blocking is in the way"""
+        blocking = esper._components.get(cmp.Blocking, set())
+        blocking_ids = np.fromiter(blocking, dtype=np.int32)
+        graph = (~np.isin(self.cell_ids(), blocking_ids)).astype(np.int8)
+        player = ecs.Query(cmp.Player).first()
+        for chunk in self.chunks.values():
+            for (x, y), stack in chunk.stacks.items():
+                if player in stack:  # same as has_blocker, the player's spot stays open
+                    graph[x, y] = 1
+                elif not stack.isdisjoint(blocking):
+                    graph[x, y] = 0
         return graph
 
     def has_blocker(self, x, y):
-        for ent in self.entities[x][y]:
+        for ent in self.entities_at(x, y):
             # TODO: Is it safe to remove this player check?
             if esper.has_component(ent, cmp.Player):
                 return False
             if esper.has_component(ent, cmp.Blocking):
                 return True
-        cell = self.cells[x][y]
-        return esper.has_component(cell, cmp.Blocking)
+        return False
 
     def _in_bounds(self, x: int, y: int) -> bool:
         if x < 0 or y < 0:
             return False
-        if x > dis.BOARD_WIDTH - 1 or y > dis.BOARD_HEIGHT - 1:
+        if x > self.width - 1 or y > self.height - 1:
             return False
         return True
 
     def get_cell(self, x: int, y: int) -> typ.CELL:
-        if self._in_bounds(x, y):
-            return self.cells[x][y]
-        raise IndexError(f"No such cell {x=} {y=}")
+        if not self._in_bounds(x, y):
+            raise IndexError(f"No such cell {x=} {y=}")
+        chunk = self.chunks.get((x // CHUNK, y // CHUNK))
+        return int(chunk.cells[x % CHUNK, y % CHUNK]) if chunk else 0
 
     def set_cell(self, x: int, y: int, cell: typ.CELL):
         if not self._in_bounds(x, y):
             raise IndexError()
-        esper.delete_entity(self.cells[x][y], immediate=True)
-        self.cells[x][y] = cell
+        key = (x // CHUNK, y // CHUNK)
+        chunk = self.chunks.get(key) or self.chunks.setdefault(key, Chunk())
+        old_cell = int(chunk.cells[x % CHUNK, y % CHUNK])
+        if old_cell:
+            esper.delete_entity(old_cell, immediate=True)
+        chunk.cells[x % CHUNK, y % CHUNK] = cell
+        self.revision += 1
+        ecs.Dirty.mark(old_cell, cell)
+        ecs.Dirty.mark_meta("cells")
+        if stack := chunk.stacks.get((x, y)):
+            stack.discard(old_cell)
+            stack.add(cell)
+        self.update_free(x, y)
 
     def retile(self, x: int, y: int, gen_tile: Callable):
         """create a tile and place it at position"""
         self.set_cell(x, y, gen_tile(x, y))
 
     def entities_at(self, x: int, y: int) -> set:
-        """a reference to the entity set at an xy"""
-        return self.entities[x][y]
+        """
+        the entities at an xy, cell included
+        don't add to it, the board only keeps sets where more than a cell stands
+        """
+        chunk = self.chunks.get((x // CHUNK, y // CHUNK))
+        if chunk is None:
+            return set()
+        if stack := chunk.stacks.get((x, y)):
+            return stack
+        cell = int(chunk.cells[x % CHUNK, y % CHUNK])
+        return {cell} if cell else set()
 
     def pieces_at(self, x: int, y: int) -> set:
         """entities, but without cells, crosshair, etc"""
-        entities = self.entities[x][y]
-        cell = self.cells[x][y]
+        chunk = self.chunks.get((x // CHUNK, y // CHUNK))
+        if chunk is None or (x, y) not in chunk.stacks:
+            return set()
+        cell = int(chunk.cells[x % CHUNK, y % CHUNK])
         xhair = ecs.Query(cmp.Crosshair).first()
-        return {e for e in entities if e not in [cell, xhair]}
+        return {e for e in chunk.stacks[x, y] if e not in [cell, xhair]}
+
+    def place(self, entity: int, x: int, y: int):
+        """put something that isn't a cell at xy"""
+        key = (x // CHUNK, y // CHUNK)
+        chunk = self.chunks.get(key) or self.chunks.setdefault(key, Chunk())
+        if not (stack := chunk.stacks.get((x, y))):
+            cell = int(chunk.cells[x % CHUNK, y % CHUNK])
+            stack = chunk.stacks[x, y] = {cell} if cell else set()
+        stack.add(entity)
+        ecs.Dirty.mark(entity)
+        self.update_free(x, y)
+
+    def _take(self, entity: int, x: int, y: int) -> bool:
+        """the inverse of place, False if entity wasn't there"""
+        chunk = self.chunks.get((x // CHUNK, y // CHUNK))
+        stack = chunk.stacks.get((x, y)) if chunk else None
+        if not stack or entity not in stack:
+            return False
+        stack.remove(entity)
+        if stack <= {int(chunk.cells[x % CHUNK, y % CHUNK])}:
+            del chunk.stacks[x, y]  # back to just the cell
+        ecs.Dirty.mark(entity)
+        self.update_free(x, y)
+        return True
 
     def remove(self, entity: int):
         if pos := esper.component_for_entity(entity, cmp.Position):
             esper.remove_component(entity, cmp.Position)
-            self.entities_at(*pos).remove(entity)
+            self._take(entity, *pos)
 
     def as_sequence(self, x: slice = slice(None), y: slice = slice(None)):
-        for col in self.cells[x]:
-            for cell in col[y]:
-                yield cell
+        yield from self.cell_ids(x, y).ravel().tolist()
 
     def build_entity_cache(self):
-        for x in range(dis.BOARD_WIDTH):
-            for y in range(dis.BOARD_HEIGHT):
-                self.entities[x][y] = set()
+        """
+        rebuild stacks and the free index from scratch, for loads and new levels
+        place, _take and set_cell keep them current otherwise
+        """
+        for chunk in self.chunks.values():
+            chunk.stacks = {}
+        self.free = FreeCells()
         for entity, pos in esper.get_component(cmp.Position):
-            self.entities_at(*pos).add(entity)
+            if entity != self.get_cell(*pos):
+                self.place(entity, *pos)
+
+        ids = self.cell_ids()
+        wall_ids = np.fromiter(esper._components.get(cmp.Wall, set()), dtype=np.int32)
+        open_floor = (ids != 0) & ~np.isin(ids, wall_ids)
+        for chunk in self.chunks.values():
+            for x, y in chunk.stacks:
+                if open_floor[x, y] and self.pieces_at(x, y):
+                    open_floor[x, y] = False
+        for x, y in np.argwhere(open_floor).tolist():
+            self.free.add((x, y))
+
+    def entity_cache(self) -> tuple:
+        """the stacks and free coords, so a snapshot can carry them instead of a rebuild"""
+        stacks = {key: chunk.stacks for key, chunk in self.chunks.items() if chunk.stacks}
+        return stacks, self.free.coords
+
+    def load_entity_cache(self, cache: tuple):
+        """the inverse of entity_cache. takes ownership, so pass it a copy"""
+        stacks, coords = cache
+        for key, chunk in self.chunks.items():
+            chunk.stacks = stacks.pop(key, {})
+        for key, chunk_stacks in stacks.items():  # pieces where no cell was ever set
+            self.chunks.setdefault(key, Chunk()).stacks = chunk_stacks
+        self.free = FreeCells()
+        self.free.coords = list(coords)
+        self.free.slots = {coord: slot for slot, coord in enumerate(coords)}
 
     def reposition(self, entity: int, x: int, y: int):
         pos = esper.component_for_entity(entity, cmp.Position)
-        if entity in self.entities_at(*pos):
-            self.entities[pos.x][pos.y].remove(entity)
+        self._take(entity, pos.x, pos.y)
         pos.x, pos.y = x, y
-        self.entities[x][y].add(entity)
+        self.place(entity, x, y)
+
+    def update_free(self, x: int, y: int):
+        """re-check one coord for the free cell index"""
+        cell = self.get_cell(x, y)
+        free = bool(cell) and not esper.has_component(cell, cmp.Wall)
+        if free:
+            free = not self.pieces_at(x, y)
+        if free:
+            self.free.add((x, y))
+        else:
+            self.free.discard((x, y))
+
+    def free_cells(
+        self, count: int = 1, min_distance: int = 0, visible: bool | None = None
+    ) -> list[typ.Coord]:
+        """random unoccupied spots, optionally away from the player and in/out of view"""
+        checks = []
+        if min_distance:
+            player = player_position().as_tuple
+            checks.append(lambda coord: math.dist(coord, player) >= min_distance)
+        if visible is not None:
+            fov = get_fov()
+            checks.append(lambda coord: fov[coord] == visible)
+
+        accept = None
+        if checks:
+            accept = lambda coord: all(check(coord) for check in checks)
+        return self.free.sample(count, accept)
+
+
+class Tile(enum.IntEnum):
+    """the kinds of cell a Blueprint can hold"""
+
+    FLOOR = 0
+    WALL = 1
+    BWALL = 2  # breakable wall
+    DOOR = 3
+    STAIRS = 4
+
+
+WALL_TILES = (Tile.WALL, Tile.BWALL, Tile.DOOR)
+WALKABLE_TILES = (Tile.FLOOR, Tile.DOOR, Tile.STAIRS)
+
+
+def new_tiles(width: int, height: int) -> np.ndarray:
+    return np.full((width, height), Tile.WALL, dtype=np.int8)
+
+
+@dataclass
+class Blueprint:
+    """
+    A level as plain data: tile kinds, where the player starts, what spawns where.
+    Generators only touch this, never esper, so it can be built in a worker process
+    Note: like Board.cell_ids, tiles is stored as columns, so [x][y] is the access pattern
+    """
+
+    depth: int
+    mood: dict
+    wall_glyph: str  # Glyph names, since the worker may not have remapped glyphs
+    bwall_glyph: str
+    tiles: np.ndarray  # the size of the board it becomes
+    start: tuple[int, int] = (1, 1)
+    spawns: list[tuple[Callable, int, int]] = field(default_factory=list)
+    stats: "LevelStats | None" = None
+
+    def fill(self):
+        """solid wall, some of it breakable inside the perimeter"""
+        self.tiles[:] = Tile.WALL
+        inner = self.tiles[1:-1, 1:-1]
+        breakable = math_util.np_rng().integers(0, 16, inner.shape) == 0
+        inner[breakable] = Tile.BWALL
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        width, height = self.tiles.shape
+        return 0 <= x < width and 0 <= y < height
+
+    def retile(self, x: int, y: int, tile: Tile):
+        if not self.in_bounds(x, y):
+            raise IndexError(f"No such cell {x=} {y=}")
+        self.tiles[x, y] = tile
+
+    def is_wall(self, x: int, y: int) -> bool:
+        return self.tiles[x, y] in WALL_TILES
+
+    def spawn(self, func: Callable, x: int, y: int):
+        """func gets called with a Position when the blueprint is materialized"""
+        self.spawns.append((func, x, y))
+
+
+def flood_fill(walkable: np.ndarray, start: tuple[int, int]) -> np.ndarray:
+    """mask of the walkable cells cardinally connected to start"""
+    dist = tcod.path.maxarray(walkable.shape, dtype=np.int32)
+    dist[start] = 0
+    tcod.path.dijkstra2d(dist, walkable.astype(np.int8), cardinal=1)
+    return dist != np.iinfo(np.int32).max
+
+
+def label_regions(walkable: np.ndarray) -> tuple[np.ndarray, int]:
+    """number each cardinally connected walkable area, 0 is not walkable"""
+    labels = np.zeros(walkable.shape, dtype=np.int32)
+    unlabeled = walkable.copy()
+    count = 0
+    while unlabeled.any():
+        count += 1
+        seed = np.unravel_index(unlabeled.argmax(), unlabeled.shape)
+        region = flood_fill(walkable, seed)
+        labels[region] = count
+        unlabeled &= ~region
+    return labels, count
+
+
+@dataclass
+class LevelStats:
+    regions: int  # separate walkable areas, 1 is fully connected
+    dead_ends: int
+    loops: int
+    stairs_distance: int  # steps from player start
+    dug: int  # wall cells carved to reach the stairs
+    doors_removed: int
+
+
+def fix_doors(blueprint: Blueprint) -> int:
+    """a door needs wall on two opposite sides, otherwise it's just floor"""
+    walls = np.pad(np.isin(blueprint.tiles, WALL_TILES), 1, constant_values=True)
+    horizontal = walls[:-2, 1:-1] & walls[2:, 1:-1]
+    vertical = walls[1:-1, :-2] & walls[1:-1, 2:]
+    open_horizontal = ~walls[:-2, 1:-1] & ~walls[2:, 1:-1]
+    open_vertical = ~walls[1:-1, :-2] & ~walls[1:-1, 2:]
+    framed = (horizontal & open_vertical) | (vertical & open_horizontal)
+
+    bad_doors = (blueprint.tiles == Tile.DOOR) & ~framed
+    blueprint.tiles[bad_doors] = Tile.FLOOR
+    return int(bad_doors.sum())
+
+
+def dig_path(blueprint: Blueprint, start: tuple, end: tuple) -> int:
+    """carve the route needing the least digging, returns cells dug"""
+    walls = ~np.isin(blueprint.tiles, WALKABLE_TILES)
+    cost = np.where(walls, 20, 1).astype(np.int8)
+    cost[[0, -1], :] = cost[:, [0, -1]] = 0  # leave the perimeter alone
+    graph = tcod.path.SimpleGraph(cost=cost, cardinal=1, diagonal=0)
+    pf = tcod.path.Pathfinder(graph)
+    pf.add_root(start)
+    dug = 0
+    for x, y in pf.path_to(end).tolist():
+        if walls[x, y]:
+            blueprint.tiles[x, y] = Tile.FLOOR
+            dug += 1
+    return dug
+
+
+def validate(blueprint: Blueprint) -> LevelStats:
+    """repair the layout so the stairs can be reached, then measure it"""
+    doors_removed = fix_doors(blueprint)
+    if not np.isin(blueprint.tiles[blueprint.start], WALKABLE_TILES):
+        blueprint.tiles[blueprint.start] = Tile.FLOOR
+
+    walkable = np.isin(blueprint.tiles, WALKABLE_TILES)
+    dist = tcod.path.maxarray(walkable.shape, dtype=np.int32)
+    dist[blueprint.start] = 0
+    tcod.path.dijkstra2d(dist, walkable.astype(np.int8), cardinal=1)
+    unreachable = np.iinfo(np.int32).max
+
+    dug = 0
+    if not (stairs := np.argwhere(blueprint.tiles == Tile.STAIRS)).size:
+        # no stairs at all, put them as far back as we can
+        farthest = np.where(dist == unreachable, -1, dist).argmax()
+        stairs = np.array([np.unravel_index(farthest, dist.shape)])
+        blueprint.tiles[tuple(stairs[0])] = Tile.STAIRS
+    stairs = tuple(stairs[0].tolist())
+
+    if dist[stairs] == unreachable:
+        dug = dig_path(blueprint, blueprint.start, stairs)
+        walkable = np.isin(blueprint.tiles, WALKABLE_TILES)
+        dist = tcod.path.maxarray(walkable.shape, dtype=np.int32)
+        dist[blueprint.start] = 0
+        tcod.path.dijkstra2d(dist, walkable.astype(np.int8), cardinal=1)
+
+    # loops are holes in the walkable area. by Euler's formula for a grid,
+    # holes = regions - cells + cardinal links - fully walkable 2x2 squares
+    _, regions = label_regions(walkable)
+    links_x = walkable[1:, :] & walkable[:-1, :]
+    links_y = walkable[:, 1:] & walkable[:, :-1]
+    squares = links_x[:, 1:] & links_x[:, :-1]
+    links = int(links_x.sum() + links_y.sum())
+    loops = regions - int(walkable.sum()) + links - int(squares.sum())
+
+    padded = np.pad(walkable, 1)
+    exits = padded[:-2, 1:-1].astype(np.int8) + padded[2:, 1:-1]
+    exits += padded[1:-1, :-2].astype(np.int8) + padded[1:-1, 2:]
+    dead_ends = int((walkable & (exits == 1)).sum())
+
+    return LevelStats(
+        regions=regions,
+        dead_ends=dead_ends,
+        loops=loops,
+        stairs_distance=int(dist[stairs]),
+        dug=dug,
+        doors_removed=doors_removed,
+    )
 
 
 @dataclass
@@ -261,20 +690,135 @@ class RectangularRoom:
         border = top_edge + bottom_edge + left_edge + right_edge
         return border
 
+    @property
+    def floor(self) -> np.ndarray:
+        """mask of the outer area, True where the room has floor"""
+        floor = np.zeros((self.width + 1, self.height + 1), dtype=bool)
+        floor[1:-1, 1:-1] = True
+        return floor
 
-def connect_rooms(first: RectangularRoom, second: RectangularRoom):
-    board = ecs.get_meta().board
+    @property
+    def footprint(self) -> np.ndarray:
+        """mask of the outer area, True for floor and the walls around it"""
+        return np.ones((self.width + 1, self.height + 1), dtype=bool)
+
+
+@dataclass
+class ShapedRoom(RectangularRoom):
+    """a room that only fills part of its rect. Subclasses carve the floor mask"""
+
+    @property
+    def footprint(self) -> np.ndarray:
+        floor = self.floor
+        return floor | (math_util.neighbor_counts(floor, edge=False) > 0)
+
+    def _floor_coords(self) -> np.ndarray:
+        return np.argwhere(self.floor) + (self.x1, self.y1)
+
+    @property
+    def center(self) -> cmp.Position:
+        """the floor cell closest to the middle of the rect"""
+        coords = self._floor_coords()
+        middle = ((self.x1 + self.x2) / 2, (self.y1 + self.y2) / 2)
+        x, y = coords[np.argmin(np.hypot(*(coords - middle).T))].tolist()
+        return cmp.Position(x=x, y=y)
+
+    def get_random_pos(self) -> cmp.Position:
+        coords = self._floor_coords()
+        x, y = coords[random.randrange(len(coords))].tolist()
+        return cmp.Position(x=x, y=y)
+
+    @property
+    def border_coords(self) -> list:
+        """Return the walls cardinally next to floor, so no corners."""
+        floor = np.pad(self.floor, 1)
+        horizontal = floor[:-2, 1:-1] | floor[2:, 1:-1]
+        cardinal = horizontal | floor[1:-1, :-2] | floor[1:-1, 2:]
+        border = np.argwhere(cardinal & ~self.floor) + (self.x1, self.y1)
+        return [tuple(coord) for coord in border.tolist()]
+
+
+@dataclass
+class LRoom(ShapedRoom):
+    """a rect with one quadrant cut away"""
+
+    cut: tuple[int, int] = (0, 0)  # which quadrant, 0 for the low half, 1 for high
+
+    @property
+    def floor(self) -> np.ndarray:
+        floor = super().floor
+        half_x, half_y = (self.width + 1) // 2, (self.height + 1) // 2
+        cut_x = slice(half_x, None) if self.cut[0] else slice(None, half_x)
+        cut_y = slice(half_y, None) if self.cut[1] else slice(None, half_y)
+        floor[cut_x, cut_y] = False
+        return floor
+
+
+@dataclass
+class CircularRoom(ShapedRoom):
+    @property
+    def floor(self) -> np.ndarray:
+        floor = super().floor
+        xs, ys = np.ogrid[: self.width + 1, : self.height + 1]
+        radius = min(self.width, self.height) / 2 - 0.5
+        dist_sq = (xs - self.width / 2) ** 2 + (ys - self.height / 2) ** 2
+        return floor & (dist_sq <= radius**2)
+
+
+class Occupancy:
+    """
+    cells already claimed by rooms, walls included
+    keeps a summed-area table, so checking a rect for any claim is O(1)
+    """
+
+    def __init__(self, shape: tuple[int, int]):
+        self.grid = np.zeros(shape, dtype=bool)
+        self.table = np.zeros((shape[0] + 1, shape[1] + 1), dtype=np.int32)
+
+    def rect_claimed(self, x: slice, y: slice) -> bool:
+        table = self.table
+        total = table[x.stop, y.stop] - table[x.start, y.stop]
+        total += table[x.start, y.start] - table[x.stop, y.start]
+        return bool(total)
+
+    def fits(self, room: RectangularRoom) -> bool:
+        if not self.rect_claimed(*room.outer):
+            return True
+        # the rects overlap, but the shapes might not
+        return not (self.grid[room.outer] & room.footprint).any()
+
+    def claim(self, room: RectangularRoom):
+        x, y = room.outer
+        new = room.footprint & ~self.grid[x, y]
+        self.grid[x, y] |= new
+
+        # the new cells add to every sum below and right of them
+        sums = new.cumsum(0, dtype=np.int32).cumsum(1)
+        inside_x = slice(x.start + 1, x.stop + 1)
+        inside_y = slice(y.start + 1, y.stop + 1)
+        past_x, past_y = slice(x.stop + 1, None), slice(y.stop + 1, None)
+        self.table[inside_x, inside_y] += sums
+        self.table[past_x, inside_y] += sums[-1, :]
+        self.table[inside_x, past_y] += sums[:, -1:]
+        self.table[past_x, past_y] += sums[-1, -1]
+
+
+def connect_rooms(
+    blueprint: Blueprint, first: RectangularRoom, second: RectangularRoom
+):
     pair = get_closest_pair(first.border_coords, second.border_coords)
-    tunnel_between(*pair[0], *pair[1])
+    tunnel_between(blueprint, *pair[0], *pair[1])
 
     if not random.randint(0, 1) and math.dist(*pair) > 3:
         # make doors, half the time I guess
-        board.retile(*pair[0], create.tile.door)
-        board.retile(*pair[1], create.tile.door)
+        blueprint.retile(*pair[0], Tile.DOOR)
+        blueprint.retile(*pair[1], Tile.DOOR)
 
 
-def tunnel_between(start_x: int, start_y: int, end_x: int, end_y: int):
-    """Return an L-shaped tunnel between these two points."""
+def tunnel_between(
+    blueprint: Blueprint, start_x: int, start_y: int, end_x: int, end_y: int
+):
+    """Carve an L-shaped tunnel between these two points."""
     horizontal_then_vertical = random.random() < 0.5
 
     if horizontal_then_vertical:
@@ -282,19 +826,11 @@ def tunnel_between(start_x: int, start_y: int, end_x: int, end_y: int):
     else:
         corner = start_x, end_y
 
-    board = ecs.get_meta().board
     # Generate the coordinates for this tunnel.
     for x, y in tcod.los.bresenham((start_x, start_y), corner):
-        board.retile(x, y, create.tile.floor)
+        blueprint.retile(x, y, Tile.FLOOR)
     for x, y in tcod.los.bresenham(corner, (end_x, end_y)):
-        board.retile(x, y, create.tile.floor)
-
-
-def intersects(board: Board, src: RectangularRoom, target: RectangularRoom) -> bool:
-    # Checking corner overlap is cheaper, but that doesn't work for non-rect rooms
-    src_cells = board.as_sequence(*src.outer)
-    target_cells = board.as_sequence(*target.outer)
-    return bool(set(src_cells) & (set(target_cells)))
+        blueprint.retile(x, y, Tile.FLOOR)
 
 
 def euclidean_distance(start: cmp.Position, end: cmp.Position):
@@ -334,7 +870,7 @@ def trace_ray(source: int, dest: int):
 
     trace = list(tcod.los.bresenham(source_pos.as_tuple, dest_pos.as_tuple))
     for i, (x, y) in enumerate(trace):
-        entities = board.entities[x][y]
+        entities = board.entities_at(x, y)
         for entity in entities:
             if esper.has_component(entity, cmp.Opaque):
                 if entity not in (source, dest):
@@ -343,14 +879,30 @@ def trace_ray(source: int, dest: int):
     return dest, trace
 
 
-def get_fov():
+def get_fov(area: tuple[slice, slice] | None = None) -> np.ndarray:
+    """
+    what the vision givers see, over `area` of the board (all of it by default)
+    each viewer only looks within its sight box, and is skipped if that misses area
+    """
+    stats.Stats.count("fov")
     board = ecs.get_meta().board
-    transparency = board.as_transparency()
-    fov = None
-    p = {"algorithm": tcod.libtcodpy.FOV_SHADOW, "transparency": transparency}
+    xs, ys = area or (slice(0, board.width), slice(0, board.height))
+    fov = np.zeros((xs.stop - xs.start, ys.stop - ys.start), dtype=bool)
     for _, (vis, pos) in ecs.Query(cmp.GivesVision, cmp.Position):
-        nfov = tcod.map.compute_fov(**p, pov=pos.as_tuple, radius=vis.distance)
-        fov = nfov if fov is None else fov | nfov
+        r = vis.distance
+        x0, x1 = max(pos.x - r, 0), min(pos.x + r + 1, board.width)
+        y0, y1 = max(pos.y - r, 0), min(pos.y + r + 1, board.height)
+        lo_x, hi_x = max(x0, xs.start), min(x1, xs.stop)
+        lo_y, hi_y = max(y0, ys.start), min(y1, ys.stop)
+        if lo_x >= hi_x or lo_y >= hi_y:
+            continue
+
+        transparency = board.as_transparency(slice(x0, x1), slice(y0, y1))
+        pov = (pos.x - x0, pos.y - y0)
+        algo = tcod.libtcodpy.FOV_SHADOW
+        seen = tcod.map.compute_fov(transparency, pov, radius=r, algorithm=algo)
+        seen = seen[lo_x - x0 : hi_x - x0, lo_y - y0 : hi_y - y0]
+        fov[lo_x - xs.start : hi_x - xs.start, lo_y - ys.start : hi_y - ys.start] |= seen
     return fov
 
 
@@ -359,27 +911,11 @@ def get_neighbor_coords(x: int, y: int):
     indices = [(x + dx, y + dy) for dx, dy in offsets]
     return indices
 
-def count_neighbor_walls(board, x: int, y: int):
-    indices = get_neighbor_coords(x, y)
-    neighbor_walls = 0
-    for x, y in indices:
-        try:
-            cell = board.get_cell(x, y)
-            if esper.has_component(cell, cmp.Wall):
-                neighbor_walls += 1
-        except IndexError:
-            pass
-    return neighbor_walls
-
-
-def build_perimeter_wall(board):
-    border = {(0, y) for y in range(dis.BOARD_HEIGHT)}
-    border |= {(dis.BOARD_WIDTH - 1, y) for y in range(dis.BOARD_HEIGHT)}
-    border |= {(x, 0) for x in range(dis.BOARD_WIDTH)}
-    border |= {(x, dis.BOARD_HEIGHT - 1) for x in range(dis.BOARD_WIDTH)}
 
-    for x, y in border:
-        board.retile(x, y, create.tile.wall)
+def build_perimeter_wall(blueprint: Blueprint):
+    tiles = blueprint.tiles
+    tiles[0, :] = tiles[-1, :] = Tile.WALL
+    tiles[:, 0] = tiles[:, -1] = Tile.WALL
 
 
 def player_hears(pos: cmp.Position):
@@ -391,48 +927,276 @@ def player_hears(pos: cmp.Position):
     return dist_to_player < player_cmp.perception_radius
 
 
-def new_map():
-    old_map = ecs.Query(cmp.Position).exclude(cmp.Player, cmp.Crosshair)
-    for to_del, _ in old_map:
-        esper.delete_entity(to_del, immediate=True)
+def plan_level(depth: int, seed: int, size: tuple[int, int]) -> Blueprint:
+    """lay out a level. Doesn't touch esper, so it can run in a worker process"""
+    random.seed(seed)
+    mood = dis.Mood.shuffle()
+    wall = random.choice([dis.Glyph.WALL1, dis.Glyph.WALL2])
+    bwall = random.choice([dis.Glyph.BWALL1])  # , dis.Glyph.BWALL2
+    blueprint = Blueprint(
+        depth=depth,
+        mood=mood,
+        wall_glyph=wall.name,
+        bwall_glyph=bwall.name,
+        tiles=new_tiles(*size),
+    )
+
+    maps = [RoomDungeon, DrunkenWalk, Maze, Cave]  # BSPDungeon, TestDungeon
+    mapgen_func = random.choice(maps)
+    mapgen_func(blueprint)
+    blueprint.stats = validate(blueprint)
+    return blueprint
 
+
+class NextLevel:
+    """plan the next depth in a worker process while the current one is played"""
+
+    executor: ProcessPoolExecutor | None = None
+    future: Future | None = None
+    depth: int = 0
+    seed: int = 0
+    size: tuple[int, int] = (0, 0)
+
+    @classmethod
+    def prepare(cls, depth: int, seed: int | None = None):
+        cls.depth = depth
+        cls.seed = random.getrandbits(64) if seed is None else seed
+        cls.size = (dis.BOARD_WIDTH, dis.BOARD_HEIGHT)  # read now, not at import
+        ecs.Dirty.mark_meta("next_level")
+        try:
+            if cls.executor is None:
+                # spawn, so the worker doesn't inherit the SDL context
+                ctx = multiprocessing.get_context("spawn")
+                cls.executor = ProcessPoolExecutor(max_workers=1, mp_context=ctx)
+            cls.future = cls.executor.submit(plan_level, depth, cls.seed, cls.size)
+        except (OSError, RuntimeError):
+            # no worker processes on this platform, we'll plan on demand
+            cls.executor = cls.future = None
+
+    @classmethod
+    def take(cls, depth: int) -> Blueprint:
+        """the prepared blueprint if we have one, otherwise plan it now"""
+        future, cls.future = cls.future, None
+        size = (dis.BOARD_WIDTH, dis.BOARD_HEIGHT)
+        if cls.depth != depth:
+            if future:
+                future.cancel()
+            cls.depth, cls.seed, future = depth, random.getrandbits(64), None
+        elif cls.size != size and future:
+            future.cancel()  # same level, but the size was changed since
+            future = None
+        cls.size = size
+
+        if future:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                cls.executor = None
+
+        # planning reseeds, don't let that disturb the game's rng
+        state = random.getstate()
+        blueprint = plan_level(depth, cls.seed, cls.size)
+        random.setstate(state)
+        return blueprint
+
+
+def materialize(blueprint: Blueprint):
+    """swap in a new board, with entities for the blueprint's cells and spawns"""
     game_meta = ecs.Query(cmp.GameMeta).first()
+    if esper.has_component(game_meta, cmp.MapInfo):
+        esper.remove_component(game_meta, cmp.MapInfo)
+    map_info = cmp.MapInfo(
+        mood=blueprint.mood,
+        palette=math_util.AliasTable(blueprint.mood, batch=blueprint.tiles.size),
+        depth=blueprint.depth,
+        wall_glyph=dis.Glyph[blueprint.wall_glyph],
+        bwall_glyph=dis.Glyph[blueprint.bwall_glyph],
+        stats=blueprint.stats,
+    )
+    esper.add_component(game_meta, map_info)
+
+    tile_makers = {
+        Tile.FLOOR: create.tile.floor,
+        Tile.WALL: create.tile.wall,
+        Tile.BWALL: partial(create.tile.wall, breakable=True),
+        Tile.DOOR: create.tile.door,
+        Tile.STAIRS: create.tile.stairs,
+    }
+    board = Board(*blueprint.tiles.shape)
+    cells = [
+        [tile_makers[tile](x, y) for y, tile in enumerate(col)]
+        for x, col in enumerate(blueprint.tiles.tolist())
+    ]
+    board.load_cells(cells)
+
+    game_meta_cmp = esper.component_for_entity(game_meta, cmp.GameMeta)
+    game_meta_cmp.board = board
+
+    player_pos = player_position()
+    player_pos.x, player_pos.y = blueprint.start
+    for spawn, x, y in blueprint.spawns:
+        spawn(cmp.Position(x, y))
+    board.build_entity_cache()
+
+
+class Levels:
+    """
+    levels we've left, parked as compressed buffers so going back finds them as left
+    entities keep their ids while parked, esper never hands those out again
+    """
+
+    parked: dict[int, bytes] = {}
+    top: int = 0  # highest id parked, so new entities are numbered past it
 
-    def new_map_info():
-        depth = 0
+    @classmethod
+    def park(cls):
+        """pack the current level away and take its entities out of the world"""
+        game_meta = ecs.Query(cmp.GameMeta).first()
+        map_info = esper.component_for_entity(game_meta, cmp.MapInfo)
+        level = ecs.Query(cmp.Position).exclude(cmp.Player, cmp.Crosshair)
+        entities = {entity for entity, _ in level}
+        board = ecs.get_meta().board
+        state = {
+            "components": ecs.pack(entities),
+            "cells": board.cell_ids(),
+            "explored": board.explored,
+            "remembered": board.remembered,
+            "map_info": map_info,
+            "player": player_position().as_tuple,
+        }
+        state = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        cls.parked[map_info.depth] = zlib.compress(state)
+        ecs.Dirty.mark_meta("levels")
+        cls.top = max(cls.top, max(entities, default=0))
+        for entity in entities:
+            esper.delete_entity(entity, immediate=True)
+
+    @classmethod
+    def unpark(cls, depth: int) -> bool:
+        """bring a parked level back as the current one, False if we never left it"""
+        if depth not in cls.parked:
+            return False
+        state = pickle.loads(zlib.decompress(cls.parked.pop(depth)))
+        ecs.Dirty.mark_meta("levels")
+        ecs.unpack(state["components"])
+
+        game_meta = ecs.Query(cmp.GameMeta).first()
         if esper.has_component(game_meta, cmp.MapInfo):
-            depth = esper.component_for_entity(game_meta, cmp.MapInfo).depth
             esper.remove_component(game_meta, cmp.MapInfo)
-        mood = dis.Mood.shuffle()
-        wall = random.choice([dis.Glyph.WALL1, dis.Glyph.WALL2])
-        bwall = random.choice([dis.Glyph.BWALL1])  # , dis.Glyph.BWALL2
-        mi = cmp.MapInfo(mood=mood, wall_glyph=wall, bwall_glyph=bwall, depth=depth + 1)
-        esper.add_component(game_meta, mi)
+        esper.add_component(game_meta, state["map_info"])
 
-    new_map_info()
+        board = Board(*state["cells"].shape)
+        board.load_cells(state["cells"])
+        board.explored, board.remembered = state["explored"], state["remembered"]
+        ecs.get_meta().board = board
+        player_pos = player_position()
+        player_pos.x, player_pos.y = state["player"]
+        board.build_entity_cache()
+        return True
 
-    game_meta_cmp = esper.component_for_entity(game_meta, cmp.GameMeta)
-    game_meta_cmp.board = Board()
-    maps = [RoomDungeon, DrunkenWalk, Maze]  # BSPDungeon, TestDungeon
-    mapgen_func = random.choice(maps)
-    mapgen_func(game_meta_cmp.board)
-    game_meta_cmp.board.build_entity_cache()
+    @classmethod
+    def clear(cls):
+        cls.parked, cls.top = {}, 0
+        ecs.Dirty.mark_meta("levels")
+
+
+def new_map(depth: int | None = None):
+    """leave for depth, the next one down by default. levels we've seen come back"""
+    game_meta = ecs.Query(cmp.GameMeta).first()
+    current = 0
+    if map_info := esper.try_component(game_meta, cmp.MapInfo):
+        current = map_info.depth
+        Levels.park()
+    depth = current + 1 if depth is None else depth
+
+    if not Levels.unpark(depth):
+        materialize(NextLevel.take(depth))
+    if depth + 1 not in Levels.parked:
+        NextLevel.prepare(depth + 1)
+    ecs.Dirty.mark_all()  # a whole new world, not worth diffing
+
+
+# spawn tables are compiled once per depth, then sampled in batches
+
+
+@cache
+def room_spawns(depth: int) -> math_util.AliasTable:
+    spawn_table = {
+        create.npc.bat: max(0, 5 - depth),
+        create.npc.skeleton: 2,
+        create.npc.warlock: 1 + depth // 3,
+        create.npc.cyclops: depth // 5,
+        create.item.potion: 2,
+        create.item.scroll: 1,
+    }
+    return math_util.AliasTable(spawn_table)
+
+
+@cache
+def cave_spawns() -> math_util.AliasTable:
+    spawn_table = {
+        create.item.spike_trap: 3,
+        create.item.potion: 2,
+        create.item.scroll: 1,
+        create.npc.bat: 5,
+        create.npc.goblin: 3,
+        create.npc.warlock: 1,
+    }
+    return math_util.AliasTable(spawn_table)
+
+
+@cache
+def maze_spawns(depth: int) -> math_util.AliasTable:
+    spawn_table = {
+        create.item.spike_trap: 3,
+        create.npc.bat: max(0, 5 - depth),
+        create.npc.goblin: 3,
+        create.npc.warlock: 1 + depth // 3,
+        create.npc.spider: depth // 5,
+    }
+    return math_util.AliasTable(spawn_table)
+
+
+@cache
+def maze_loot() -> math_util.AliasTable:
+    spawn_table = {
+        create.item.potion: 2,
+        create.item.scroll: 1,
+    }
+    return math_util.AliasTable(spawn_table)
+
+
+@cache
+def walk_spawns(depth: int) -> math_util.AliasTable:
+    spawn_table = {
+        create.item.spike_trap: 3,
+        create.item.potion: 2,
+        create.item.scroll: 1,
+        create.npc.bat: max(0, 5 - depth),
+        create.npc.goblin: 3,
+        create.npc.warlock: depth // 2,
+        create.npc.living_flame: depth // 3,
+    }
+    return math_util.AliasTable(spawn_table)
 
 
 class RoomDungeon:
-    board: Board
+    blueprint: Blueprint
     rooms: list[RectangularRoom]
     centers: list[cmp.Position]
+    occupancy: Occupancy
+    shapes = {RectangularRoom: 6, LRoom: 2, CircularRoom: 1}
 
-    def __init__(self, board: Board):
-        self.board = board
+    def __init__(self, blueprint: Blueprint):
+        self.blueprint = blueprint
         self.rooms = []
         self.centers = []
+        self.occupancy = Occupancy(blueprint.tiles.shape)
         self.build()
 
-    def build(self, max_rooms=30, max_rm_siz=10, min_rm_siz=6):
-        self.board.fill()
-        for _ in range(max_rooms):
+    def build(self, attempts=60, max_rm_siz=10, min_rm_siz=6):
+        self.blueprint.fill()
+        for _ in range(attempts):
             room_width = random.randint(min_rm_siz, max_rm_siz)
             room_height = random.randint(min_rm_siz, max_rm_siz)
 
@@ -440,27 +1204,31 @@ class RoomDungeon:
                 self.rooms.append(room)
 
         last_center = self.rooms[-1].center
-        self.board.retile(last_center.x, last_center.y, create.tile.stairs)
+        self.blueprint.retile(last_center.x, last_center.y, Tile.STAIRS)
 
     def make_room(self, width: int, height: int):
-        x = random.randint(0, dis.BOARD_WIDTH - width - 1)
-        y = random.randint(0, dis.BOARD_HEIGHT - height - 1)
-
-        room = RectangularRoom(x, y, width, height)
-        if any(intersects(self.board, room, r) for r in self.rooms):
+        board_width, board_height = self.blueprint.tiles.shape
+        x = random.randint(0, board_width - width - 1)
+        y = random.randint(0, board_height - height - 1)
+
+        shape = math_util.rand_from_table(self.shapes)
+        if shape is LRoom:
+            cut = (random.randint(0, 1), random.randint(0, 1))
+            room = LRoom(x, y, width, height, cut=cut)
+        else:
+            room = shape(x, y, width, height)
+        if not self.occupancy.fits(room):
             return  # This room intersects, so go to the next attempt
 
-        for cell in self.board.as_sequence(*room.inner):
-            pos = esper.component_for_entity(cell, cmp.Position)
-            self.board.retile(pos.x, pos.y, create.tile.floor)
+        self.occupancy.claim(room)
+        self.blueprint.tiles[room.outer][room.floor] = Tile.FLOOR
 
         if len(self.rooms) == 0:  # start player in first room
-            pos = player_position()
-            pos.x, pos.y = room.center.x, room.center.y
+            self.blueprint.start = room.center.as_tuple
         else:  # All rooms after the first get one tunnel and enemy
-            end_ctr = get_closest_pair([room.center], self.centers)[1]
-            idx = self.centers.index(end_ctr)
-            connect_rooms(room, self.rooms[idx])
+            centers = np.array([center.as_tuple for center in self.centers])
+            idx = np.argmin(np.hypot(*(centers - room.center.as_tuple).T))
+            connect_rooms(self.blueprint, room, self.rooms[idx])
             self.populate(room)
 
         self.centers.append(room.center)
@@ -468,119 +1236,118 @@ class RoomDungeon:
 
     def populate(self, room: RectangularRoom):
         """fill a room with pieces"""
-        depth = ecs.Query(cmp.GameMeta).cmp(cmp.MapInfo).depth
+        depth = self.blueprint.depth
 
-        for _ in range(random.randint(1, 3 + depth // 5)):
-            spawn_table = {
-                create.npc.bat: max(0, 5 - depth),
-                create.npc.skeleton: 2,
-                create.npc.warlock: 1 + depth // 3,
-                create.npc.cyclops: depth // 5,
-                create.item.potion: 2,
-                create.item.scroll: 1,
-            }
-            spawn = math_util.rand_from_table(spawn_table)
-            spawn(room.get_random_pos())
+        count = random.randint(1, 3 + depth // 5)
+        for spawn in room_spawns(depth).sample(count):
+            self.blueprint.spawn(spawn, *room.get_random_pos())
 
 
 class Cave:
-    board: Board
+    """
+    cellular automata on a wall mask
+    rule is B/S notation: a floor with a B count of wall neighbors becomes wall,
+    and a wall with an S count stays one
+    """
+
+    blueprint: Blueprint
+    rule: str = "B5678/S45678"
+    passes: int = 4
 
-    def __init__(self, board: Board):
-        self.board = board
+    def __init__(self, blueprint: Blueprint, rule: str | None = None):
+        self.blueprint = blueprint
+        self.rule = rule or self.rule
         self.build()
 
-    def create_gaps(self):
-        for cell in self.board.as_sequence():
-            if not random.randint(0, 1):
-                cell_pos = esper.component_for_entity(cell, cmp.Position)
-                self.board.retile(*cell_pos.as_tuple, create.tile.floor)
+    @staticmethod
+    def parse_rule(rule: str) -> tuple[list[int], list[int]]:
+        birth, survive = rule.upper().split("/")
+        return [int(n) for n in birth[1:]], [int(n) for n in survive[1:]]
 
-    def horizontal_blanking(self):
-        """big gap in the middle to islands don't form"""
-        x_slice = slice(3, dis.BOARD_WIDTH - 3)
-        y_slice = slice(dis.CENTER_H - 1, dis.CENTER_H + 2)
-        for cell in self.board.as_sequence(x_slice, y_slice):
-            player_pos = esper.component_for_entity(cell, cmp.Position)
-            self.board.retile(*player_pos.as_tuple, create.tile.floor)
-
-    def automata(self):
-        neighbours = matrix(dis.BOARD_WIDTH, dis.BOARD_HEIGHT, 0)
-        cell_autamata_passes = 4
-        for _ in range(cell_autamata_passes):
-            for cell in self.board.as_sequence():
-                player_pos = esper.component_for_entity(cell, cmp.Position)
-                wall_count = count_neighbor_walls(self.board, *player_pos)
-                neighbours[player_pos.x][player_pos.y] = wall_count
-
-        for x, row in enumerate(neighbours):
-            for y in range(len(row)):
-                tile = None
-                if neighbours[x][y] >= 5:
-                    breakable = not random.randint(0, 15)
-                    tile = create.tile.wall(x, y, breakable=breakable)
-                elif neighbours[x][y] <= 4:
-                    tile = create.tile.floor(x, y)
-                if tile:
-                    self.board.set_cell(x, y, tile)
-
-    def populate(self):
-        player_pos = player_position()
+    def create_gaps(self) -> np.ndarray:
+        """start with a coin flip for every cell"""
+        shape = self.blueprint.tiles.shape
+        return math_util.np_rng().integers(0, 2, shape).astype(bool)
 
-        valid_spawns = []
-        while len(valid_spawns) < 20:
-            x = random.randint(0, dis.BOARD_WIDTH - 1)
-            y = random.randint(0, dis.BOARD_HEIGHT - 1)
-            cell = self.board.cells[x][y]
-            pos = esper.component_for_entity(cell, cmp.Position)
-            wall_count = count_neighbor_walls(self.board, *pos)
-            if wall_count == 0:
-                dist = math.dist(player_pos.as_tuple, (x, y))
-                valid_spawns.append([dist, pos])
-        valid_spawns = sorted(valid_spawns, key=lambda x: x[0])
-        stair_pos = valid_spawns[-1][1]
-        self.board.retile(stair_pos.x, stair_pos.y, create.tile.stairs)
-
-        spawn_table = {
-            create.item.spike_trap: 3,
-            create.item.potion: 2,
-            create.item.scroll: 1,
-            create.npc.bat: 5,
-            create.npc.goblin: 3,
-            create.npc.warlock: 1,
-        }
-        for _, pos in valid_spawns[:-1]:
-            spawn = math_util.rand_from_table(spawn_table)
-            self.board.retile(pos.x, pos.y, create.tile.floor)
-            new_pos = cmp.Position(pos.x, pos.y)
-            spawn(new_pos)
+    def horizontal_blanking(self, walls: np.ndarray):
+        """big gap in the middle to islands don't form"""
+        width, height = walls.shape
+        center_h = height // 2
+        walls[3 : width - 3, center_h - 1 : center_h + 2] = False
+
+    def automata(self, walls: np.ndarray) -> np.ndarray:
+        birth, survive = self.parse_rule(self.rule)
+        for _ in range(self.passes):
+            neighbours = math_util.neighbor_counts(walls)
+            born = ~walls & np.isin(neighbours, birth)
+            survived = walls & np.isin(neighbours, survive)
+            walls = born | survived
+        return walls
+
+    def remove_islands(self, walls: np.ndarray) -> np.ndarray:
+        """wall in any floor the player can't walk to"""
+        return ~flood_fill(~walls, self.blueprint.start)
+
+    def populate(self, walls: np.ndarray):
+        rng = math_util.np_rng()
+        open_floor = ~walls & (math_util.neighbor_counts(walls) == 0)
+        open_floor[self.blueprint.start] = False
+        candidates = np.argwhere(open_floor)
+        picks = rng.choice(len(candidates), min(20, len(candidates)), replace=False)
+        valid_spawns = candidates[picks]
+        if not len(valid_spawns):
+            return
+
+        dists = np.hypot(*(valid_spawns - self.blueprint.start).T)
+        valid_spawns = valid_spawns[np.argsort(dists)].tolist()
+        self.blueprint.retile(*valid_spawns[-1], Tile.STAIRS)
+
+        spawns = cave_spawns().sample(len(valid_spawns) - 1)
+        for spawn, (x, y) in zip(spawns, valid_spawns[:-1]):
+            self.blueprint.spawn(spawn, x, y)
 
     def build(self):
-        self.board.fill()
-        self.create_gaps()
-        self.horizontal_blanking()
+        width, height = self.blueprint.tiles.shape
+        self.blueprint.start = (width // 2, height // 2)
 
-        self.automata()
+        walls = self.create_gaps()
+        self.horizontal_blanking(walls)
+        walls = self.automata(walls)
 
-        build_perimeter_wall(self.board)
+        walls[[0, -1], :] = walls[:, [0, -1]] = True
         # TODO: the 3 cells closes to corner should be wall too
+        walls = self.remove_islands(walls)
 
-        player_pos = player_position()
-        player_pos.x = dis.BOARD_WIDTH // 2
-        player_pos.y = dis.BOARD_HEIGHT // 2
+        breakable = math_util.np_rng().integers(0, 16, walls.shape) == 0
+        tiles = np.where(breakable, Tile.BWALL, Tile.WALL)
+        self.blueprint.tiles[:] = np.where(walls, tiles, Tile.FLOOR)
+        build_perimeter_wall(self.blueprint)
 
-        self.populate()
+        self.populate(walls)
 
 
 class Maze:
-    board: Board
+    """
+    A maze is carved at 1/4 scale, then hydrated onto the board
+    odd coord pairs of the maze are nodes, the cells between them are walls
+    algorithm picks how the spanning tree of nodes gets carved,
+    braid is the fraction of dead ends that get knocked through into loops
+    """
+
+    blueprint: Blueprint
+    offsets = [(-1, 0), (0, -1), (0, 1), (1, 0)]
+
+    def __init__(
+        self, blueprint: Blueprint, algorithm: str | None = None, braid: float = 0.1
+    ):
+        self.blueprint = blueprint
 
-    def __init__(self, board: Board):
-        self.board = board
+        algorithms = {"backtracker": self.backtracker, "wilson": self.wilson}
+        carve = algorithms[algorithm or random.choice(list(algorithms))]
 
-        blueprint, seen, dead_ends = self.make_blueprint()
-        self.build(blueprint, seen)
-        self.populate(seen, dead_ends)
+        maze, start, stairs = self.make_blueprint(carve, braid)
+        self.build(maze, start, stairs)
+        self.populate(maze, start, stairs)
 
     def hydrate(self, x):
         return (x * 2) - 1
@@ -588,128 +1355,163 @@ class Maze:
     def dehydrate(self, x):
         return (x + 1) // 2
 
-    def make_blueprint(self):
-        """
-        1/4 scale blueprint for maze
-        every every odd coord pair is a wall
-        we start at a random location and pick a neighbor at random
-        add current space to backtrack stack
-        break wall between current and neighbor. Add both to visited set
-        then pick an unvisited neighbor and repeat
-        when there are no neighbors, pop stack and try again for that space
-        """
-        end_x = (dis.BOARD_WIDTH // 2) + 1
-        end_y = (dis.BOARD_HEIGHT // 2) + 1
-        blueprint = matrix(end_x, end_y, 1)
-
-        # even coord pairs are floor nodes, to be connected
-        for x in range(end_x):
-            for y in range(end_y):
-                if x % 2 == 1 and y % 2 == 1:
-                    blueprint[x][y] = 0
-
-        start_x = random.choice([15, 17])
-        start_y = random.choice([15, 17])
-
-        def get_neighbors(seen: list, c_x: int, c_y: int):
-            offsets = [(-2, 0), (0, -2), (0, 2), (2, 0)]
-            indices = [(c_x + dx, c_y + dy) for dx, dy in offsets]
+    def node_shape(self, maze: np.ndarray) -> tuple[int, int]:
+        """node (i, j) lives at maze (2i+1, 2j+1), leaving a wall on every edge"""
+        return (maze.shape[0] - 1) // 2, (maze.shape[1] - 1) // 2
 
-            neighbors = []
-            for x, y in indices:
-                if x > 0 and x < end_x and y > 0 and y < end_y:
-                    if [x, y] not in seen:
-                        neighbors.append([x, y])
-            return neighbors
+    def node_neighbors(self, shape: tuple[int, int], x: int, y: int) -> list:
+        width, height = shape
+        indices = [(x + dx, y + dy) for dx, dy in self.offsets]
+        return [(x, y) for x, y in indices if 0 <= x < width and 0 <= y < height]
 
-        def break_wall_between(coord1, coord2):
-            x = (coord1[0] + coord2[0]) // 2
-            y = (coord1[1] + coord2[1]) // 2
+    def break_wall_between(self, maze: np.ndarray, node1, node2):
+        maze[node1[0] + node2[0] + 1, node1[1] + node2[1] + 1] = False
 
-            blueprint[x][y] = 0
-
-        current = [start_x, start_y]
+    def backtracker(self, maze: np.ndarray):
+        """
+        start at a random node, and step to a random unvisited neighbor
+        breaking the wall between them, and pushing onto the backtrack stack
+        when there are no unvisited neighbors, pop the stack and try again from there
+        """
+        shape = self.node_shape(maze)
+        visited = np.zeros(shape, dtype=bool)
+        current = (random.randrange(shape[0]), random.randrange(shape[1]))
+        visited[current] = True
         backtrack = [current]
-        seen = [current]
         while backtrack:
-            n = get_neighbors(seen, *current)
-            if n:
-                next = random.choice(n)
-                break_wall_between(current, next)
-                backtrack.append(next)
-                current = next
-                seen.append(current)
-            else:
-                current = backtrack.pop()
-
-        dead_ends = []
-        for x in range(end_x):
-            for y in range(end_y):
-                if [x, y] in (seen[-1], seen[0]):
-                    continue
-                if x % 2 == 1 and y % 2 == 1:
-                    walls = 0
-                    for ox, oy in [(-1, 0), (1, 0), (0, 1), (0, -1)]:
-                        walls += blueprint[x + ox][y + oy]
-                    if walls == 3:
-                        dead_ends.append([x, y])
+            current = backtrack[-1]
+            neighbors = self.node_neighbors(shape, *current)
+            unvisited = [n for n in neighbors if not visited[n]]
+            if not unvisited:
+                backtrack.pop()
+                continue
+            next = random.choice(unvisited)
+            self.break_wall_between(maze, current, next)
+            visited[next] = True
+            backtrack.append(next)
 
-        return blueprint, seen, dead_ends
+    def wilson(self, maze: np.ndarray):
+        """
+        loop-erased random walks. slower than backtracking, but unbiased,
+        so there are fewer long corridors and more short branches
+        each walk wanders until it hits the maze, remembering only the last exit
+        it took from each node, which erases any loops it made along the way
+        """
+        shape = self.node_shape(maze)
+        in_maze = np.zeros(shape, dtype=bool)
+        in_maze[random.randrange(shape[0]), random.randrange(shape[1])] = True
+
+        nodes = [(x, y) for x in range(shape[0]) for y in range(shape[1])]
+        random.shuffle(nodes)
+        for node in nodes:
+            exits = {}
+            current = node
+            while not in_maze[current]:
+                exits[current] = random.choice(self.node_neighbors(shape, *current))
+                current = exits[current]
+
+            current = node
+            while not in_maze[current]:
+                in_maze[current] = True
+                self.break_wall_between(maze, current, exits[current])
+                current = exits[current]
+
+    def closed_sides(self, maze: np.ndarray) -> np.ndarray:
+        """how many of each node's 4 walls are still standing"""
+        width, height = self.node_shape(maze)
+        x_end, y_end = 2 * width + 1, 2 * height + 1
+        left = maze[0 : x_end - 1 : 2, 1:y_end:2]
+        right = maze[2:x_end:2, 1:y_end:2]
+        up = maze[1:x_end:2, 0 : y_end - 1 : 2]
+        down = maze[1:x_end:2, 2:y_end:2]
+        return left.astype(np.int8) + right + up + down
+
+    def braid(self, maze: np.ndarray, fraction: float):
+        """knock dead ends through to a neighbor, turning them into loops"""
+        shape = self.node_shape(maze)
+        dead_ends = np.argwhere(self.closed_sides(maze) == 3).tolist()
+        random.shuffle(dead_ends)
+        for x, y in dead_ends[: int(len(dead_ends) * fraction)]:
+            if self.closed_sides(maze)[x, y] != 3:
+                continue  # opened by an earlier knock
+            # the border is one of the closed sides for dead ends on the edge
+            walled = [
+                n
+                for n in self.node_neighbors(shape, x, y)
+                if maze[x + n[0] + 1, y + n[1] + 1]
+            ]
+            self.break_wall_between(maze, (x, y), random.choice(walled))
+
+    def make_blueprint(self, carve: Callable, braid: float):
+        """
+        carve a maze, then put the player in a dead end
+        and the stairs at the node farthest (by walking) from it
+        returns the maze and the start and stair coords, in maze space
+        """
+        end_x = (self.blueprint.tiles.shape[0] // 2) + 1
+        end_y = (self.blueprint.tiles.shape[1] // 2) + 1
+        maze = np.ones((end_x, end_y), dtype=bool)
+        width, height = self.node_shape(maze)
+        maze[1 : 2 * width : 2, 1 : 2 * height : 2] = False
+
+        carve(maze)
+        if braid:
+            self.braid(maze, braid)
+
+        nodes = maze[1 : 2 * width : 2, 1 : 2 * height : 2]
+        starts = np.argwhere(self.closed_sides(maze) == 3)
+        if not len(starts):
+            starts = np.argwhere(~nodes)
+        start = tuple((2 * starts[random.randrange(len(starts))] + 1).tolist())
+
+        dist = tcod.path.maxarray(maze.shape, dtype=np.int32)
+        dist[start] = 0
+        tcod.path.dijkstra2d(dist, (~maze).astype(np.int8), cardinal=1)
+        node_dist = np.where(nodes, -1, dist[1 : 2 * width : 2, 1 : 2 * height : 2])
+        farthest = np.argwhere(node_dist == node_dist.max())[0]
+        stairs = tuple((2 * farthest + 1).tolist())
+
+        return maze, start, stairs
 
     def place_from_table(self, spawn_table, coords, odds):
-        for x, y in coords:
-            if not random.randint(0, odds):
-                continue
-
+        coords = [coord for coord in coords if random.randint(0, odds)]
+        for spawn, (x, y) in zip(spawn_table.sample(len(coords)), coords):
             offset = random.choice([(0, 0), (1, 0), (0, 1), (1, 1)])
             spawn_x = self.hydrate(x) + offset[0]
             spawn_y = self.hydrate(y) + offset[1]
-            pos = cmp.Position(x=spawn_x, y=spawn_y)
+            self.blueprint.spawn(spawn, spawn_x, spawn_y)
 
-            spawn = math_util.rand_from_table(spawn_table)
-            spawn(pos)
+    def build(self, maze, start, stairs):
+        self.blueprint.start = tuple(map(self.hydrate, start))
+        stair_x, stair_y = map(self.hydrate, stairs)
 
-    def build(self, blueprint, seen):
-        self.board.fill()
-        player_pos = player_position()
+        # every board cell looks up the maze cell it was scaled up from
+        tiles = self.blueprint.tiles
+        bx = self.dehydrate(np.arange(tiles.shape[0]))
+        by = self.dehydrate(np.arange(tiles.shape[1]))
+        tiles[:] = np.where(maze[np.ix_(bx, by)], Tile.WALL, Tile.FLOOR)
+        self.blueprint.retile(stair_x, stair_y, Tile.STAIRS)
 
-        player_pos.x, player_pos.y = map(self.hydrate, seen[-1])
-        stair_x, stair_y = map(self.hydrate, seen[0])
+    def populate(self, maze, start, stairs):
+        depth = self.blueprint.depth
+        width, height = self.node_shape(maze)
 
-        for cell in self.board.as_sequence():
-            pos = esper.component_for_entity(cell, cmp.Position)
-            bx, by = map(self.dehydrate, pos.as_tuple)
-            if blueprint[bx][by]:
-                cell = create.tile.wall(*pos)
-            else:
-                cell = create.tile.floor(*pos)
-            self.board.set_cell(pos.x, pos.y, cell)
-        self.board.retile(stair_x, stair_y, create.tile.stairs)
-
-    def populate(self, seen, dead_ends):
-        depth = ecs.Query(cmp.GameMeta).cmp(cmp.MapInfo).depth
-
-        spawn_table = {
-            create.item.spike_trap: 3,
-            create.npc.bat: max(0, 5 - depth),
-            create.npc.goblin: 3,
-            create.npc.warlock: 1 + depth // 3,
-            create.npc.spider: depth // 5,
-        }
+        def without_ends(nodes: np.ndarray) -> list:
+            coords = (2 * nodes + 1).tolist()
+            return [c for c in coords if tuple(c) not in (start, stairs)]
 
-        self.place_from_table(spawn_table, seen[1:-1], 2)
-        spawn_table = {
-            create.item.potion: 2,
-            create.item.scroll: 1,
-        }
-        self.place_from_table(spawn_table, dead_ends, 2)
+        nodes = np.argwhere(~maze[1 : 2 * width : 2, 1 : 2 * height : 2])
+        self.place_from_table(maze_spawns(depth), without_ends(nodes), 2)
+
+        dead_ends = np.argwhere(self.closed_sides(maze) == 3)
+        self.place_from_table(maze_loot(), without_ends(dead_ends), 2)
 
 
 class BSPDungeon:
-    board: Board
+    blueprint: Blueprint
 
-    def __init__(self, board: Board):
-        self.board = board
+    def __init__(self, blueprint: Blueprint):
+        self.blueprint = blueprint
         self.build()
 
     def connect(self, tree, bsp, node):
@@ -718,7 +1520,7 @@ class BSPDungeon:
         leaf2 = tree[bsp.find_node(node2.x, node2.y)]
 
         # TODO: tunnel could be better. we want to only connect adjacent rooms
-        connect_rooms(leaf1, leaf2)
+        connect_rooms(self.blueprint, leaf1, leaf2)
 
     def room_from_node(self, node) -> RectangularRoom:
         min_size = 5  # Minimum size for both width and height
@@ -734,8 +1536,9 @@ class BSPDungeon:
         return room
 
     def build(self):
-        self.board.fill()
-        bsp = tcod.bsp.BSP(x=0, y=0, width=BOARD_MAX, height=BOARD_MAX)
+        self.blueprint.fill()
+        width, height = self.blueprint.tiles.shape
+        bsp = tcod.bsp.BSP(x=0, y=0, width=width - 1, height=height - 1)
         bsp.split_recursive(
             depth=5,
             min_width=5,
@@ -754,69 +1557,53 @@ class BSPDungeon:
                 room = self.room_from_node(node)
 
                 tree[node] = room
-                for cell in self.board.as_sequence(*room.inner):
-                    pos = esper.component_for_entity(cell, cmp.Position)
-                    self.board.retile(pos.x, pos.y, create.tile.floor)
+                self.blueprint.tiles[room.inner] = Tile.FLOOR
         rooms = list(tree.values())
 
         start_room = random.choice(rooms)
-        ppos = player_position()
-        ppos.x, ppos.y = start_room.center.x, start_room.center.y
+        self.blueprint.start = start_room.center.as_tuple
 
         for room in tree.values():
             self.populate(room)
 
         stair_pos = random.choice(rooms).get_random_pos()
         # do we wanna make sure start and stair rooms are further?
-        self.board.retile(stair_pos.x, stair_pos.y, create.tile.stairs)
+        self.blueprint.retile(stair_pos.x, stair_pos.y, Tile.STAIRS)
 
     def populate(self, room: RectangularRoom):
         """fill a room with pieces"""
-        depth = ecs.Query(cmp.GameMeta).cmp(cmp.MapInfo).depth
+        depth = self.blueprint.depth
 
-        for _ in range(random.randint(1, 3)):
-            spawn_table = {
-                create.npc.bat: max(0, 5 - depth),
-                create.npc.skeleton: 2,
-                create.npc.warlock: 1 + depth // 3,
-                create.npc.cyclops: depth // 5,
-                create.item.potion: 2,
-                create.item.scroll: 1,
-            }
-            spawn = math_util.rand_from_table(spawn_table)
-            spawn(room.get_random_pos())
+        for spawn in room_spawns(depth).sample(random.randint(1, 3)):
+            self.blueprint.spawn(spawn, *room.get_random_pos())
 
 
 class TestDungeon:
-    board: Board
+    blueprint: Blueprint
 
-    def __init__(self, board: Board):
-        self.board = board
+    def __init__(self, blueprint: Blueprint):
+        self.blueprint = blueprint
         self.build()
 
     def build(self):
         """one room, one enemy, one item"""
-        self.board.fill()
-        room_x = dis.BOARD_WIDTH // 2
-        room_y = dis.BOARD_HEIGHT // 2
+        self.blueprint.fill()
+        room_x = self.blueprint.tiles.shape[0] // 2
+        room_y = self.blueprint.tiles.shape[1] // 2
         new_room = RectangularRoom(room_x, room_y, 10, 10)
-        for cell in self.board.as_sequence(*new_room.inner):
-            pos = esper.component_for_entity(cell, cmp.Position)
-            self.board.retile(pos.x, pos.y, create.tile.floor)
+        self.blueprint.tiles[new_room.inner] = Tile.FLOOR
 
-        pos = player_position()
-        pos.x, pos.y = new_room.center.x, new_room.center.y
-        create.npc.cyclops(new_room.get_random_pos())
-        create.item.potion(new_room.get_random_pos())
-        create.item.scroll(new_room.get_random_pos())
-        self.board.build_entity_cache()
+        self.blueprint.start = new_room.center.as_tuple
+        self.blueprint.spawn(create.npc.cyclops, *new_room.get_random_pos())
+        self.blueprint.spawn(create.item.potion, *new_room.get_random_pos())
+        self.blueprint.spawn(create.item.scroll, *new_room.get_random_pos())
 
 
 class DrunkenWalk:
-    board: Board
+    blueprint: Blueprint
 
-    def __init__(self, board: Board):
-        self.board = board
+    def __init__(self, blueprint: Blueprint):
+        self.blueprint = blueprint
         path = self.build()
         self.populate(path)
 
@@ -826,15 +1613,25 @@ class DrunkenWalk:
         only move onto walls
         if no walls, pop stack
         """
-        self.board.fill()
+        self.blueprint.fill()
+        # the wall mask and its neighbor counts are kept up to date as we dig
+        walls = np.isin(self.blueprint.tiles, WALL_TILES)
+        wall_counts = math_util.neighbor_counts(walls, edge=False)
 
-        x = random.randint(1, BOARD_MAX)
-        y = random.randint(1, BOARD_MAX)
+        def dig(x, y):
+            self.blueprint.retile(x, y, Tile.FLOOR)
+            if walls[x, y]:
+                walls[x, y] = False
+                wall_counts[max(0, x - 1) : x + 2, max(0, y - 1) : y + 2] -= 1
+                wall_counts[x, y] += 1  # not its own neighbor
 
-        player_pos = player_position()
-        player_pos.x, player_pos.y = x, y
+        max_x, max_y = (side - 1 for side in self.blueprint.tiles.shape)
+        x = random.randint(1, max_x)
+        y = random.randint(1, max_y)
+
+        self.blueprint.start = (x, y)
 
-        self.board.retile(x, y, create.tile.floor)
+        dig(x, y)
         floor_goal = 1000
         path = [(x, y)]
 
@@ -843,60 +1640,51 @@ class DrunkenWalk:
             offsets = [(-1, 0), (0, -1), (0, 1), (1, 0)]
             for dx, dy in random.sample(offsets, k=4):
                 new_x, new_y = x + dx, y + dy
-                if 0 < new_x < BOARD_MAX and 0 < new_y < BOARD_MAX:
+                if 0 < new_x < max_x and 0 < new_y < max_y:
                     # counting here so that passages stay narrow, not cavernous
-                    if count_neighbor_walls(self.board, new_x, new_y) >= 4:
-                        cell = self.board.get_cell(new_x, new_y)
-                        if esper.has_component(cell, cmp.Wall):
-                            return new_x, new_y
+                    if wall_counts[new_x, new_y] >= 4 and walls[new_x, new_y]:
+                        return new_x, new_y
             return None
 
         for _ in range(floor_goal):
             nxt = get_walkable_wall(x, y)
-            while nxt is None:
+            while nxt is None and path:
                 nxt = get_walkable_wall(*path.pop())
+            if nxt is None:
+                break  # boxed in, validate will place the stairs
             x, y = nxt
-            self.board.retile(x, y, create.tile.floor)
+            dig(x, y)
             path.append(nxt)
-        # TODO: IndexError in path still theoretically possible here?
 
-        self.board.retile(path[-1][0], path[-1][1], create.tile.stairs)
+        if path:
+            self.blueprint.retile(path[-1][0], path[-1][1], Tile.STAIRS)
         return path
 
     def populate(self, path):
-        depth = ecs.Query(cmp.GameMeta).cmp(cmp.MapInfo).depth
+        depth = self.blueprint.depth
         spawn_goal = 20 + depth
 
-        spawn_table = {
-            create.item.spike_trap: 3,
-            create.item.potion: 2,
-            create.item.scroll: 1,
-            create.npc.bat: max(0, 5 - depth),
-            create.npc.goblin: 3,
-            create.npc.warlock: depth // 2,
-            create.npc.living_flame: depth // 3,
-        }
-
         floor_tiles = path[:-1]
+        spawn_goal = min(spawn_goal, len(floor_tiles))
         spawn_tiles = random.sample(floor_tiles, k=spawn_goal)
-        for x, y in spawn_tiles:
-            spawn = math_util.rand_from_table(spawn_table)
-            new_pos = cmp.Position(x, y)
-            spawn(new_pos)
+        spawns = walk_spawns(depth).sample(spawn_goal)
+        for spawn, (x, y) in zip(spawns, spawn_tiles):
+            self.blueprint.spawn(spawn, x, y)
 
         floor_tiles = [tile for tile in floor_tiles if tile not in spawn_tiles]
         self.populate_grass(floor_tiles)
 
     def populate_grass(self, floor_tiles: list[tuple]):
         """pick an offset for grass start, make 4-8 tiles, repeat"""
+        if len(floor_tiles) < 2:
+            return
         start = random.randrange(0, len(floor_tiles) // 2)
         end = start + math_util.biased_randint(4, 10, lam=1)
         for i, tile in enumerate(floor_tiles):
             if i < start:
                 continue
             if i < end:
-                grass_pos = cmp.Position(*tile)
-                create.item.grass(grass_pos)
+                self.blueprint.spawn(create.item.grass, *tile)
             elif i == end:
                 start = random.randrange(i, len(floor_tiles))
                 grass_count = math_util.biased_randint(4, 10, lam=1)
@@ -1,18 +1,25 @@
+import startup  # first, so it can time the other imports
+
+import multiprocessing
+import os
 from functools import partial
 
-import esper
 import tcod
 
-import components as cmp
+import components  # noqa: F401  (must load before display, they import each other)
 import display as dis
-import location
+import event
 import phase
+import replay
+import save
 
 
 def main() -> None:
+    startup.Startup.mark("imports")
     tile_atlas = "assets/monochrome-transparent_packed.png"
     tileset = dis.load_tileset(tile_atlas, dis.TS_WIDTH, dis.TS_HEIGHT)
     dis.Glyph = dis.remap_glyphs()
+    startup.Startup.mark("tileset")
 
     context_params = {
         "width": dis.CONSOLE_WIDTH,
@@ -25,22 +32,28 @@ def main() -> None:
     context = tcod.context.new(**context_params)
     console = context.new_console(order="F")
 
-    context.present = partial(context.present, keep_aspect=True)
+    present = partial(context.present, keep_aspect=True)
+    if startup.ENABLED:
+        present = startup.first_frame(present)
+    dis.Frames.present = present
+    context.present = dis.Frames.publish
     if context.sdl_window:
         context.sdl_window.fullscreen = tcod.context.SDL_WINDOW_FULLSCREEN_DESKTOP
+    startup.Startup.mark("window")
 
-    game_meta = cmp.GameMeta(location.Board(), context, console)
-    esper.create_entity(game_meta)
-
-    position_cmp = cmp.Position(x=0, y=0)
-    esper.create_entity(cmp.Crosshair(), position_cmp)
+    if record_path := os.environ.get("MALEFICER_RECORD"):
+        replay.Recorder.start(record_path)
 
-    phase.setup(context, console)
-    phase.change_to(phase.Ontology.main_menu)
+    phase.start(context, console)
+    startup.Startup.mark("main menu")
 
-    while True:
-        esper.process()
+    try:
+        phase.run()
+    finally:
+        save.Writer.flush()
+        event.Echo.flush()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # level pregen workers in pyinstaller builds
     main()
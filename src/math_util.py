@@ -6,6 +6,7 @@ import numpy as np
 
 import components as cmp
 import ecs
+import registry
 import typ
 
 
@@ -19,6 +20,7 @@ def apply_damage(target: typ.Entity, value: int):
     hp = esper.component_for_entity(target, cmp.Health)
     hp.current -= value
     hp.current = clamp(hp.current, hp.max)
+    ecs.Dirty.mark(target)
 
 
 def get_push_coords(source: typ.Coord, target: typ.Entity, distance: int):
@@ -40,9 +42,11 @@ def get_push_coords(source: typ.Coord, target: typ.Entity, distance: int):
             dest_y = y
     return dest_x, dest_y
 
+@registry.register
 def bresenham_ray(origin: typ.Coord, dest: typ.Coord):
     """bresenham line, but continue past dest to wall"""
     board = ecs.get_meta().board
+    origin = tuple(origin)  # auras pass a Position
 
     dx = abs(dest[0] - origin[0])
     dy = abs(dest[1] - origin[1])
@@ -83,6 +87,67 @@ def rand_from_table(table: dict):
     return selection[0]
 
 
+class AliasTable:
+    """
+    weighted table compiled with Vose's alias method
+    building is O(n) once, after that every draw is O(1) and batches are vectorized
+    """
+
+    def __init__(self, table: dict, batch: int = 256):
+        self.items = list(table.keys())
+        weights = np.array(list(table.values()), dtype=np.float64)
+        if not len(weights) or weights.sum() <= 0:
+            raise ValueError("Total of weights must be greater than zero")
+
+        size = len(weights)
+        scaled = weights * size / weights.sum()
+        self.prob = np.ones(size)
+        self.alias = np.arange(size)
+        small = [i for i in range(size) if scaled[i] < 1]
+        large = [i for i in range(size) if scaled[i] >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        # anything left over is 1 give or take float error, so prob stays 1
+
+        self.batch = batch
+        self._drawn = []
+
+    def sample_indices(self, count: int) -> np.ndarray:
+        rng = np_rng()
+        column = rng.integers(0, len(self.items), size=count)
+        keep = rng.random(count) < self.prob[column]
+        return np.where(keep, column, self.alias[column])
+
+    def sample(self, count: int) -> list:
+        return [self.items[i] for i in self.sample_indices(count).tolist()]
+
+    def draw(self):
+        """single pick, served from a pre-rolled batch"""
+        if not self._drawn:
+            self._drawn = self.sample(self.batch)
+        return self._drawn.pop()
+
+
+def np_rng() -> np.random.Generator:
+    """a numpy generator seeded from `random`, so seeding one seeds both"""
+    return np.random.default_rng(random.getrandbits(64))
+
+
+def neighbor_counts(mask: np.ndarray, edge: bool = True) -> np.ndarray:
+    """for each cell, how many of its 8 neighbors are set. a 3x3 box convolution"""
+    width, height = mask.shape
+    padded = np.pad(mask.astype(np.int8), 1, constant_values=edge)
+    counts = np.zeros(mask.shape, dtype=np.int8)
+    for dx in range(3):
+        for dy in range(3):
+            counts += padded[dx : dx + width, dy : dy + height]
+    return counts - mask
+
+
 def roll(num_dice, sides):
     return sum(random.randint(1, sides) for _ in range(num_dice))
 
@@ -1,16 +1,26 @@
 # game loops
 import enum
+import time
 
 import esper
 
 import components as cmp
 import create
+import location
 import processors
 import ecs
+import stats
 
 ALL = dict()
 
 
+class Screen:
+    """what phases render to, kept so they can be built on first change_to"""
+
+    context = None
+    console = None
+
+
 class Ontology(enum.Enum):
     main_menu = enum.auto()
     options = enum.auto()
@@ -50,6 +60,7 @@ def game_over_phase(context, console):
 
 def level_phase(context, console):
     upkeep = processors.Upkeep()
+    explore = processors.Explore()
 
     render = processors.BoardRender(context, console)
     input = processors.GameInputEvent()
@@ -59,16 +70,19 @@ def level_phase(context, console):
     # TODO: is it safe to remove this dmg here?
     dmg = processors.Damage()
     death = processors.Death()
+    autosave = processors.Autosave()
     enqueue = processors.Enqueue(_phase=Ontology.level)
 
     level_procs = [
         upkeep,
+        explore,
         render,
         input,
         dmg,
         eval,
         act,
         death,
+        autosave,
         enqueue,
     ]
     ALL[Ontology.level] = level_procs
@@ -123,6 +137,7 @@ def select_phase(context, console):
 
 
 def change_to(next_phase: Ontology, start_proc: type[esper.Processor] | None = None):
+    build(next_phase)
     processors.PROC_QUEUE.clear()
     processors.PROC_QUEUE.append(ALL[next_phase][-1])
 
@@ -140,30 +155,70 @@ def change_to(next_phase: Ontology, start_proc: type[esper.Processor] | None = N
             processors.PROC_QUEUE.popleft()
 
 
+def run():
+    """
+    the main loop. run the current processor, then advance the queue
+    input processors block on the event queue, so nothing spins between keys
+    """
+    game_meta = ecs.Query(cmp.GameMeta).val
+    while True:
+        proc = game_meta.process
+        began = time.perf_counter()
+        proc._process()
+        if isinstance(proc, processors.Enqueue):
+            stats.Stats.end_turn()
+        elif not isinstance(proc, processors.InputEvent):  # idle, not work
+            stats.Stats.timed(type(proc).__name__, time.perf_counter() - began)
+        game_meta.process = processors.PROC_QUEUE.popleft()
+
+
 def oneshot(proctype: type[esper.Processor]):
     """immidiately run the process, since we are still in another proc"""
     if proc_instance := esper.get_processor(proctype):
         proc_instance._process()
 
 
+BUILDERS = {
+    Ontology.main_menu: main_menu_phase,
+    Ontology.level: level_phase,
+    Ontology.target: targeting_phase,
+    Ontology.inventory: inventory_phase,
+    Ontology.options: options_phase,
+    Ontology.about: about_phase,
+    Ontology.char_select: select_phase,
+    Ontology.game_over: game_over_phase,
+}
+
+
+def build(ontology: Ontology):
+    """construct a phase and its processors the first time it's entered"""
+    if ontology in ALL:
+        return
+    BUILDERS[ontology](Screen.context, Screen.console)
+    for proc in ALL[ontology]:
+        esper.add_processor(proc)
+
+
 def setup(context, console):
-    main_menu_phase(context, console)
-    level_phase(context, console)
-    targeting_phase(context, console)
-    inventory_phase(context, console)
-    options_phase(context, console)
-    about_phase(context, console)
-    select_phase(context, console)
-    game_over_phase(context, console)
+    """only the shared processors, phases wait for change_to"""
+    Screen.context, Screen.console = context, console
 
     animation = processors.Animation(context, console)
     esper.add_processor(animation)
     esper.add_processor(processors.Movement())
     esper.add_processor(processors.Spawn())
 
-    for procs in ALL.values():
-        for proc in procs:
-            esper.add_processor(proc)
+
+def start(context, console):
+    """a fresh world, sitting at the main menu"""
+    game_meta = cmp.GameMeta(location.Board(), context, console)
+    esper.create_entity(game_meta)
+
+    position_cmp = cmp.Position(x=0, y=0)
+    esper.create_entity(cmp.Crosshair(), position_cmp)
+
+    setup(context, console)
+    change_to(Ontology.main_menu)
 
 
 def redraw():
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 import time
 import esper
+import numpy as np
 import tcod
 from tcod import libtcodpy
 
@@ -18,6 +19,8 @@ import location
 import math_util
 import typ
 import phase
+import save
+import stats
 
 
 PROC_QUEUE = collections.deque()
@@ -39,11 +42,13 @@ def flash():
     """flashes the screen, for use on errors"""
     meta = ecs.get_meta()
     meta.console.clear()
-    white_out = lambda _: (1, dis.Color.WHITE, dis.Color.WHITE)
-    cell_rgbs = [list(map(white_out, row)) for row in meta.board.cells]
+    width, height = dis.Camera.size()
+    white_out = (1, dis.Color.WHITE, dis.Color.WHITE)
+    cell_rgbs = [[white_out] * height for _ in range(width)]
 
     dis.write_rgbs(meta.console, cell_rgbs)
     meta.context.present(meta.console)
+    dis.Frames.flush()
 
     event.redraw()
 
@@ -61,6 +66,7 @@ class Processor(esper.Processor):
         raise NotImplementedError
 
     def process(self):
+        """for esper.process. the game itself dispatches through phase.run"""
         game_meta = ecs.Query(cmp.GameMeta).val
 
         if self == game_meta.process:
@@ -92,6 +98,7 @@ class Movement(Processor):
                 esper.remove_component(target, cmp.Opaque)
                 vis = esper.component_for_entity(target, cmp.Visible)
                 vis.glyph = dis.Glyph.ODOOR
+                ecs.Dirty.mark(target)
             else:
                 event.Log.append("can't move there")
                 flash()
@@ -127,6 +134,7 @@ class Movement(Processor):
             return
 
         if last_pos := esper.try_component(mover, cmp.LastPosition):
+            ecs.Dirty.mark(mover)
             last_pos.pos.x = pos.x
             last_pos.pos.y = pos.y
             if not movement.relative:
@@ -198,23 +206,19 @@ class NPCAct(Processor):
         for entity, (_, intent) in enemies:
             intent.action(entity)
             esper.remove_component(entity, cmp.Intent)
+        phase.oneshot(Animation)
 
 
 @dataclass
 class Damage(Processor):
-    def _make_message(self, damage):
+    def _log(self, damage):
         source_name = damage.source[cmp.KnownAs].name
         if cmp.Visible in damage.source:
             src_color = damage.source[cmp.Visible].color
             source_name = dis.colored_text(source_name, src_color)
         target_name = event.Log.color_fmt(damage.target)
         # target_name = f"{target_name}#{damage.target}"
-
-        if damage.amount >= 0:
-            amount = dis.colored_text(damage.amount, dis.Color.RED)
-            return f"{source_name} deals {amount} damage to {target_name}"
-        amount = dis.colored_text(-1 * damage.amount, dis.Color.GREEN)
-        return f"{source_name} heals {target_name} for {amount}"
+        event.Log.tally(source_name, target_name, damage.amount)
 
     def _resolve_cell_damage(self, damage_event):
         board = ecs.get_meta().board
@@ -252,12 +256,10 @@ class Damage(Processor):
 
             math_util.apply_damage(damage_event.target, damage_event.amount)
 
-            message = self._make_message(damage_event)
-
             if cmp.Position not in damage_event.source or location.player_hears(
                 damage_event.source[cmp.Position]
             ):
-                event.Log.append(message)
+                self._log(damage_event)
 
 
 @dataclass
@@ -288,7 +290,6 @@ class Death(Processor):
             if esper.has_component(killable, cmp.Cell):
                 floor = create.tile.floor(pos.x, pos.y)
                 board.set_cell(pos.x, pos.y, floor)
-                board.build_entity_cache()
             else:
                 board.remove(killable)
                 player = ecs.Query(cmp.Player).first()
@@ -307,25 +308,48 @@ class InputEvent(Processor):
     def exit(self):
         raise SystemExit()
 
+    def repaint(self):
+        """the window was uncovered or resized, show the last frame again"""
+        dis.Frames.flush(again=True)
+
+    def catch_up(self):
+        """called before blocking on input, once buffered keys run out"""
+
+    def wait(self):
+        """block until something happens, so an idle game costs no cpu"""
+        dis.Frames.flush()
+        input.Commands.take(input.Commands.source.events())
+
+    def handle_pending(self):
+        """window and quit events, some read while a run or animation checked keys"""
+        while input.Commands.pending:
+            input_event = input.Commands.pending.popleft()
+            if isinstance(input_event, tcod.event.Quit):
+                self.exit()
+            elif input_event.type in ("WindowExposed", "WindowSizeChanged"):
+                self.repaint()
+
     def _process(self):
-        listen = True
-        while listen:
-            for input_event in tcod.event.wait():
-                # if we ever have other events we care abt, we can dispatch by type
-                if not isinstance(input_event, tcod.event.KeyDown):
-                    continue
-                if input_event.sym in self.action_map:
-                    try:
-                        match self.action_map[input_event.sym]:
-                            case (func, args):
-                                func(*args)
-                            case func:
-                                func()
-                    except typ.InvalidAction as e:
-                        flash()
-                        event.Log.append(str(e))
-                    else:
-                        listen = False
+        while True:
+            self.handle_pending()
+            if not input.Commands.buffer:
+                self.catch_up()
+                self.wait()
+                continue
+            key = input.Commands.pop()
+            if key.sym not in self.action_map:
+                continue
+            try:
+                match self.action_map[key.sym]:
+                    case (func, args):
+                        func(*args)
+                    case func:
+                        func()
+            except typ.InvalidAction as e:
+                flash()
+                event.Log.append(str(e))
+            else:
+                return
 
 
 @dataclass
@@ -347,8 +371,15 @@ class GameInputEvent(InputEvent):
             input.KEYMAP[input.Input.INVENTORY]: self.to_inventory,
             input.KEYMAP[input.Input.SKIP]: self.skip,
             input.KEYMAP[input.Input.FULLSCREEN]: dis.fullscreen_toggle,
+            input.KEYMAP[input.Input.DEBUG]: self.toggle_stats,
         }
 
+    def toggle_stats(self):
+        """show or hide the overlay, without spending a turn"""
+        stats.Stats.toggle()
+        event.redraw()
+        phase.change_to(phase.Ontology.level, GameInputEvent)
+
     def to_inventory(self):
         try:
             ecs.Query(cmp.InInventory).first()
@@ -357,18 +388,51 @@ class GameInputEvent(InputEvent):
 
         phase.change_to(phase.Ontology.inventory)
 
+    def catch_up(self):
+        if input.Commands.stale:
+            event.redraw()
+
+    def _process(self):
+        if input.Commands.run:
+            if self.keep_running():
+                self.move(*input.Commands.run)
+                return
+            input.Commands.run = None
+        super()._process()
+
     def skip(self):
         event.Tick()
 
+    def visible_enemies(self) -> set:
+        in_fov = location.get_fov()
+        enemies = ecs.Query(cmp.Enemy, cmp.Position)
+        return {ent for ent, (_, pos) in enemies if in_fov[pos.x][pos.y]}
+
+    def keep_running(self) -> bool:
+        """runs stop at a keypress, a blocker, a new enemy in view, or getting hurt"""
+        if input.interrupted():
+            return False
+        board = ecs.get_meta().board
+        pos = location.player_position()
+        dx, dy = input.Commands.run
+        if board.has_blocker(pos.x + dx, pos.y + dy):
+            return False
+        hp = ecs.Query(cmp.Player, cmp.Health).cmp(cmp.Health)
+        if hp.current < input.Commands.hp:
+            return False
+        return self.visible_enemies() <= input.Commands.seen
+
     def move(self, x, y):
         player = ecs.Query(cmp.Player).first()
+        if not input.Commands.run and input.held(input.Input.RUN):
+            input.Commands.run = (x, y)
+            input.Commands.seen = self.visible_enemies()
+            input.Commands.hp = esper.component_for_entity(player, cmp.Health).current
         event.Movement(player, x, y, relative=True)
         event.Tick()
 
     def handle_slot_key(self, slot: int):
-        state = tcod.event.get_keyboard_state()
-        alt_key = input.KEYMAP[input.Input.ALTERNATE]
-        if state[alt_key.scancode]:
+        if input.held(input.Input.ALTERNATE):
             self.unlearn(slot)
             return
         self.to_target(slot)
@@ -379,6 +443,7 @@ class GameInputEvent(InputEvent):
         for spell_ent, (attuned) in esper.get_component(cmp.Attuned):
             if attuned.slot == slot:
                 esper.remove_component(spell_ent, cmp.Attuned)
+                ecs.Dirty.mark(spell_ent)
                 scroll = create.item.scroll(spell=spell_ent)
                 esper.add_component(scroll, cmp.InInventory())
                 unlearned = True
@@ -430,6 +495,56 @@ class Render(Processor):
         self.context.present(self.console)
 
 
+def board_rgbs(xs: slice, ys: slice, in_fov: np.ndarray) -> np.ndarray:
+    """an area's cells as they look unlit, with what stands on them where in view"""
+    board = ecs.get_meta().board
+    ids = board.cell_ids(xs, ys)
+    glyphs, fgs, bgs = zip(*map(board.as_rgb, ids.ravel().tolist()))
+    cell_rgbs = np.empty(ids.shape, dtype=tcod.console.rgb_graphic)
+    cell_rgbs["ch"] = np.reshape(glyphs, ids.shape)
+    cell_rgbs["fg"] = np.reshape(fgs, (*ids.shape, 3))
+    cell_rgbs["bg"] = np.reshape(bgs, (*ids.shape, 3))
+
+    for x, y in np.argwhere(in_fov).tolist():
+        pieces = board.pieces_at(xs.start + x, ys.start + y)
+        if not pieces:
+            continue
+        front = pieces.pop()
+        for piece in pieces:
+            if esper.has_component(piece, cmp.Blocking):
+                # Blocking pieces have display precedence
+                front = piece
+        if vis := esper.try_component(front, cmp.Visible):
+            cell_rgbs[x, y] = (vis.glyph, vis.color, vis.bg_color)
+    return cell_rgbs
+
+
+@dataclass
+class Explore(Processor):
+    """
+    once a turn, mark what's in view explored and remember how it looks
+    the render only reads those, since turns that are fast forwarded aren't drawn
+    """
+
+    def _process(self):
+        board = ecs.get_meta().board
+        fov = location.get_fov()
+        if not fov.any():
+            return
+        cols = np.flatnonzero(fov.any(axis=1))
+        rows = np.flatnonzero(fov.any(axis=0))
+        xs = slice(int(cols[0]), int(cols[-1]) + 1)
+        ys = slice(int(rows[0]), int(rows[-1]) + 1)
+        in_view = fov[xs, ys]
+
+        cell_rgbs = board_rgbs(xs, ys, in_view)
+        remembered = board.remembered[xs, ys]
+        if (remembered[in_view] != cell_rgbs[in_view]).any():
+            ecs.Dirty.mark_meta("explored", "remembered")
+        board.explored[xs, ys] |= in_view
+        remembered[in_view] = cell_rgbs[in_view]
+
+
 @dataclass
 class BoardRender(Render):
     context: tcod.context.Context
@@ -494,13 +609,12 @@ class BoardRender(Render):
 
     def _right_panel(self, panel_params):
         self.console.draw_frame(x=dis.R_PANEL_START, **panel_params)
-        panel_params["x"] = dis.R_PANEL_START + 1
-        panel_params["y"] = 1
-        panel_params["width"] = dis.PANEL_IWIDTH
-        panel_params["height"] = dis.PANEL_IHEIGHT
-
-        message = "\n".join([m[0] for m in event.Log.messages])
-        self.console.print_box(string=message, **panel_params)
+        if stats.Stats.shown:
+            lines = stats.Stats.lines(dis.PANEL_IHEIGHT)
+            for y_idx, line in enumerate(lines, start=1):
+                self.console.print(dis.R_PANEL_START + 1, y_idx, line)
+            return
+        event.Log.render().blit(self.console, dest_x=dis.R_PANEL_START + 1, dest_y=1)
 
     def _left_panel(self, panel_params):
         self.console.draw_frame(x=0, **panel_params)
@@ -568,70 +682,54 @@ class BoardRender(Render):
                 ret.append(f"{cnd_typ.__name__} {cnd.value}")
         return ret
 
-    def _apply_lighting(self, cell_rgbs, in_fov) -> list[list[typ.CELL_RGB]]:
-        """display cells in fov with lighting, explored without, and hide the rest"""
+    def _apply_lighting(self, cell_rgbs, in_fov) -> np.ndarray:
+        """display cells in fov with lighting, explored as remembered, hide the rest"""
         board = ecs.get_meta().board
         # for screenshots, debugging
-        # for cell in board.as_sequence():
-        #     location.Board.explored.add(cell)
-        for x, col in enumerate(cell_rgbs):
-            for y, (glyph, fgcolor, _) in enumerate(col):
-                cell = board.get_cell(x, y)
-                if not cell:
-                    continue
-                if in_fov[x][y]:
-                    board.explored.add(cell)
-
-                    if not esper.get_component(cmp.Targeting):
-                        # TODO: or if not TargetRender:
-                        brighter = dis.brighter(fgcolor, scale=100)
-                        cell_rgbs[x][y] = (glyph, brighter, location.backlight(x, y))
-                elif cell in board.explored:
-                    cell_rgbs[x][y] = (glyph, fgcolor, dis.Color.BLACK)
-                else:
-                    cell_rgbs[x][y] = (
-                        dis.Glyph.NONE,
-                        dis.Color.BLACK,
-                        dis.Color.BLACK,
-                    )
-        return cell_rgbs
+        # board.explored[:] = True
+        xs, ys = dis.Camera.area()
+        # Explore keeps these up to date, even for turns that are never drawn
+        explored = board.explored[xs, ys]
+        remembered = board.remembered[xs, ys]
+
+        lit = cell_rgbs.copy()
+        if in_fov.any() and not esper.get_component(cmp.Targeting):
+            # TODO: or if not TargetRender:
+            lit["fg"] = np.minimum(cell_rgbs["fg"].astype(np.int16) + 100, 255)
+            lit["bg"] = location.backlights(xs, ys)
+        fog = remembered.copy()
+        fog["bg"] = dis.Color.BLACK
+        hidden = np.zeros_like(cell_rgbs)  # all black
+        hidden["ch"] = dis.Glyph.NONE
+        return np.select([in_fov, explored], [lit, fog], hidden)
 
     def _get_cell_rgbs(self):
-        board = ecs.get_meta().board
-
-        cell_rgbs = [list(map(board.as_rgb, row)) for row in board.cells]
-
-        in_fov = location.get_fov()
-
-        for x, col in enumerate(in_fov):
-            for y, show in enumerate(col):
-                if not show:
-                    continue
-                pieces = board.pieces_at(x, y)
-                if not pieces:
-                    continue
-                front = pieces.pop()
-                for piece in pieces:
-                    if esper.has_component(piece, cmp.Blocking):
-                        # Blocking pieces have display precedence
-                        front = piece
-                if vis := esper.try_component(front, cmp.Visible):
-                    cell_rgbs[x][y] = (vis.glyph, vis.color, vis.bg_color)
-
+        """the on screen part of the board, in view coords. off screen is culled"""
+        xs, ys = dis.Camera.area()
+        in_fov = location.get_fov((xs, ys))
+        cell_rgbs = board_rgbs(xs, ys, in_fov)
         cell_rgbs = self._apply_lighting(cell_rgbs, in_fov)
 
-        aura_ents = ecs.Query(cmp.Position, cmp.Aura)
-        for _, (pos, aura) in aura_ents:
-            aura_cells = aura.callback(pos)
+        # esper's own lookup, ecs.Query would walk every cell while no Aura exists
+        for aura_ent, (pos, aura) in esper.get_components(cmp.Position, cmp.Aura):
+            aura_cells = location.footprint(aura_ent, aura.callback, pos)
             for x, y in aura_cells:
-                if not in_fov[x][y]:
+                if (view := dis.Camera.local(x, y)) is None:
                     continue
-                cell = cell_rgbs[x][y]
-                cell_rgbs[x][y] = cell[0], cell[1], aura.color
+                x, y = view
+                if in_fov[x, y]:
+                    cell_rgbs["bg"][x, y] = aura.color
 
         return cell_rgbs
 
     def _process(self):
+        if input.Commands.busy():
+            # fast forwarding through buffered keys, only the last turn is drawn
+            input.Commands.stale = True
+            return
+        input.Commands.stale = False
+        board = ecs.get_meta().board
+        dis.Camera.follow(*location.player_position(), board.width, board.height)
         self.console.clear()
         self._draw_panels()
         cell_rgbs = self._get_cell_rgbs()
@@ -652,7 +750,7 @@ class MenuRender(Render):
         y = dis.CENTER_H
 
         if self.background:
-            (self.console,) = tcod.console.load_xp(self.background, order="F")
+            dis.Assets.xp(self.background).blit(self.console)
 
         self.center_print(x, y, self.title)
 
@@ -683,7 +781,7 @@ class MenuInputEvent(InputEvent):
 
     def back(self):
         if self.menu_cmp.prev:
-            phase.change_to(self.menu_cmp.prev)
+            phase.change_to(phase.Ontology[self.menu_cmp.prev])
 
     def select(self):
         menu_selection = ecs.Query(cmp.MenuSelection, self.menu_cmp).cmp(0)
@@ -765,7 +863,7 @@ class TargetInputEvent(InputEvent):
         board = ecs.get_meta().board
 
         if not esper.has_component(targeting_entity, cmp.Target):
-            cell = xhair_pos.lookup_in(board.cells)
+            cell = board.get_cell(*xhair_pos)
             trg = cmp.Target(target=cell)
             esper.add_component(targeting_entity, trg)
 
@@ -811,7 +909,7 @@ class TargetRender(BoardRender):
 
         spell = ecs.Query(cmp.Targeting).first()
         if aoe := esper.try_component(spell, cmp.EffectArea):
-            coords = aoe.callback(xhair_pos)
+            coords = location.footprint(spell, aoe.callback, xhair_pos)
 
         pieces = [p for x, y in coords for p in board.pieces_at(x, y)]
 
@@ -833,37 +931,40 @@ class TargetRender(BoardRender):
                     self.console.print(x, y_idx, self.dashes)
 
     def _process(self) -> None:
+        targeting_ent = ecs.Query(cmp.Targeting).first()
+        pos = ecs.Query(cmp.Crosshair).cmp(cmp.Position)
+        if dis.Camera.local(*pos) is None:
+            board = ecs.get_meta().board
+            dis.Camera.follow(*pos, board.width, board.height)
+
         self.console.clear()
         self._draw_panels()
 
         cell_rgbs = self._get_cell_rgbs()
 
-        targeting_ent = ecs.Query(cmp.Targeting).first()
-        pos = ecs.Query(cmp.Crosshair).cmp(cmp.Position)
         highlighted = [pos.as_list]
 
         if aoe := esper.try_component(targeting_ent, cmp.EffectArea):
-            highlighted += aoe.callback(pos)
+            highlighted += location.footprint(targeting_ent, aoe.callback, pos)
 
         if spell := esper.try_component(targeting_ent, cmp.Spell):
             source = location.player_position()
             range_aoe = location.coords_within_radius(source, spell.target_range)
-            for x, y in range_aoe:
-                cell = cell_rgbs[x][y]
-                glyph, fg, bg = cell[0], cell[1], cell[2]
+            for x, y in filter(None, (dis.Camera.local(*c) for c in range_aoe)):
+                glyph, fg, bg = cell_rgbs[x, y].item()
+                fg, bg = tuple(fg.tolist()), tuple(bg.tolist())
 
                 fg = dis.brighter(fg, scale=100)
-                if cell[0] in dis.get_tile_glyphs():
+                if glyph in dis.get_tile_glyphs():
                     fg = dis.Color.BEIGE
                 if bg not in (dis.Color.LIGHT_RED, dis.Color.BLOOD_RED):
                     # a poor subtitute for an "is there an aoe here" check
                     bg = dis.Color.CANDLE
 
-                cell_rgbs[x][y] = glyph, fg, bg
+                cell_rgbs[x, y] = glyph, fg, bg
 
-        for x, y in highlighted:
-            cell = cell_rgbs[x][y]
-            cell_rgbs[x][y] = cell[0], cell[1], dis.Color.TARGET
+        for x, y in filter(None, (dis.Camera.local(*c) for c in highlighted)):
+            cell_rgbs["bg"][x, y] = dis.Color.TARGET
 
         self.present(cell_rgbs)
 
@@ -886,6 +987,8 @@ class InventoryRender(BoardRender):
             self.console.print(1, 3 + i, string=text, fg=fg, bg=bg)
 
     def _process(self) -> None:
+        board = ecs.get_meta().board
+        dis.Camera.follow(*location.player_position(), board.width, board.height)
         self.console.clear()
         self._draw_panels()
 
@@ -914,10 +1017,8 @@ class InventoryInputEvent(InputEvent):
         menu_selection.item = math_util.clamp(menu_selection.item, inventory_size)
 
     def handle_select(self):
-        state = tcod.event.get_keyboard_state()
-        alt_key = input.KEYMAP[input.Input.ALTERNATE]
         selection = get_selected_menuitem()
-        if state[alt_key.scancode]:
+        if input.held(input.Input.ALTERNATE):
             self.drop(selection)
             return
         self.use_item(selection)
@@ -929,7 +1030,7 @@ class InventoryInputEvent(InputEvent):
         esper.add_component(selection, drop_pos)
 
         board = ecs.get_meta().board
-        board.entities_at(*drop_pos).add(selection)
+        board.place(selection, *drop_pos)
 
         name = event.Log.color_fmt(selection)
         event.Log.append(f"dropped {name}")
@@ -940,6 +1041,7 @@ class InventoryInputEvent(InputEvent):
         try:
             event.trigger_all_callbacks(selection, cmp.UseTrigger)
             esper.remove_component(selection, cmp.InInventory)
+            ecs.Dirty.mark(selection)
             event.Tick()
             phase.change_to(phase.Ontology.level, NPCEval)
         except typ.InvalidAction as e:
@@ -1020,60 +1122,104 @@ class Upkeep(Processor):
         if not event.Queues.tick:
             return
         event.Queues.tick.clear()
+        ecs.get_meta().turn += 1
         for cnd_typ in cmp.Condition.all():
             for entity, (instance,) in ecs.Query(cnd_typ):
                 condition.apply(entity, instance)
                 instance.value -= 1
+                ecs.Dirty.mark(entity)
                 if instance.value < 1:
                     esper.remove_component(entity, cnd_typ)
+        phase.oneshot(Animation)
+
+
+@dataclass
+class Autosave(Processor):
+    """hand the turn's changes to the save writer"""
+
+    def _process(self) -> None:
+        save.autosave()
 
 
 @dataclass
 class Animation(Processor):
+    """
+    play every queued animation together, one step per frame on a fixed tick
+    frames only touch the animated cells over a cached render of the board
+    """
+
     context: tcod.context.Context
     console: tcod.console.Console
+    frame_time = 0.07  # display long enough to be seen
 
-    def flash_pos(self, coord, event):
-        """change glyph at a position"""
+    def flash_pos(self, coord, anim, base, in_fov) -> tuple[int, int] | None:
+        """change glyph at a position, returns the console coord touched"""
         x, y = coord
-        board_x = dis.BOARD_STARTX + x
-        board_y = dis.BOARD_STARTY + y
+        if (screen := dis.Camera.to_screen(x, y)) is None:
+            return None
+        board_x, board_y = screen
 
-        glyph, fg, bg = self.console.rgb[board_x, board_y]
+        glyph, fg, bg = base[board_x, board_y]
 
-        glyph = event.glyph or glyph
-        fg = event.fg or fg
-        bg = event.bg or bg
-
-        in_fov = location.get_fov()
+        glyph = anim.glyph or glyph
+        fg = anim.fg or fg
+        bg = anim.bg or bg
 
         if in_fov[x][y]:
             fg = dis.brighter(fg, scale=100)
             bg = location.backlight(x, y)
 
         self.console.rgb[board_x, board_y] = (glyph, fg, bg)
+        return board_x, board_y
+
+    def wait_for_frame(self, deadline: float) -> bool:
+        """
+        idle until the next tick. True if a keypress asked to skip ahead
+        the key still gets buffered, and anything else is left for the input loop
+        """
+        while (remaining := deadline - time.perf_counter()) > 0:
+            if input.Commands.take(tcod.event.wait(timeout=remaining)):
+                return True
+        return False
 
     def _process(self):
-        max_len = max(len(anim.locs) for anim in event.Queues.animation)
-        for idx in range(max_len):
-            for anim in event.Queues.animation:
-                if idx < len(anim.locs):
-                    coord = anim.locs[idx]
-                    self.flash_pos(coord, anim)
+        anims = list(event.Queues.animation)
+        event.Queues.animation.clear()
+        if not anims or not self.context.sdl_window or input.Commands.busy():
+            return  # headless or fast forwarding, nobody to watch
 
+        event.redraw()
+        base = self.console.rgb.copy()
+        in_fov = location.get_fov()
+
+        touched = []
+        deadline = time.perf_counter()
+        for idx in range(max(len(anim.locs) for anim in anims)):
+            for cell in touched:
+                self.console.rgb[cell] = base[cell]
+            touched = [
+                screen
+                for anim in anims
+                if idx < len(anim.locs)
+                and (screen := self.flash_pos(anim.locs[idx], anim, base, in_fov))
+            ]
             self.context.present(self.console)
-            time.sleep(0.07)  # display long enough to be seen
-            event.redraw()
+            dis.Frames.flush()  # each step has to be seen
 
-        event.Queues.animation.clear()
+            deadline += self.frame_time
+            if self.wait_for_frame(deadline):
+                break
+
+        self.console.rgb[:] = base
+        self.context.present(self.console)
 
 
 @dataclass
 class Spawn(Processor):
     def _process(self):
+        board = ecs.get_meta().board
         while event.Queues.spawn:
             spawn_event = event.Queues.spawn.popleft()
-            spawn_event.func()
-
-        board = ecs.get_meta().board
-        board.build_entity_cache()
+            entity = spawn_event.func()
+            if pos := esper.try_component(entity, cmp.Position):
+                board.place(entity, *pos)
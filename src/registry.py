@@ -0,0 +1,63 @@
+# named callables, so components hold a name and args instead of closures
+import importlib
+from collections.abc import Callable
+
+TABLE: dict[str, Callable] = {}
+
+
+class Behavior:
+    """
+    a registered function, looked up by name at call time, plus bound args
+    pickles as just the name and args, so worlds holding these can be saved
+    """
+
+    __slots__ = ("name", "args", "keywords")
+
+    def __init__(self, name: str, args: tuple = (), keywords: dict | None = None):
+        self.name = name
+        self.args = args
+        self.keywords = keywords or {}
+
+    def __call__(self, *args, **kwargs):
+        return lookup(self.name)(*self.args, *args, **self.keywords, **kwargs)
+
+    def bind(self, *args, **kwargs) -> "Behavior":
+        """like functools.partial"""
+        return Behavior(self.name, self.args + args, self.keywords | kwargs)
+
+    @property
+    def func(self) -> Callable:
+        return lookup(self.name)
+
+    def __reduce__(self):
+        return Behavior, (self.name, self.args, self.keywords)
+
+    def __eq__(self, other):
+        if not isinstance(other, Behavior):
+            return NotImplemented
+        mine = (self.name, self.args, self.keywords)
+        return mine == (other.name, other.args, other.keywords)
+
+    def __hash__(self):
+        return hash((self.name, len(self.args), tuple(self.keywords)))
+
+    def __repr__(self):
+        bound = [repr(a) for a in self.args]
+        bound += [f"{k}={v!r}" for k, v in self.keywords.items()]
+        return f"{self.name}({', '.join(bound)})"
+
+
+def register(func: Callable) -> Behavior:
+    """decorator. the module-level name now refers to the Behavior"""
+    name = f"{func.__module__}.{func.__qualname__}"
+    if name in TABLE:
+        raise ValueError(f"{name} is already registered")
+    TABLE[name] = func
+    return Behavior(name)
+
+
+def lookup(name: str) -> Callable:
+    if name not in TABLE:
+        # registration happens at import, so a fresh process may not have it yet
+        importlib.import_module(name.rpartition(".")[0])
+    return TABLE[name]
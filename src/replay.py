@@ -0,0 +1,152 @@
+# recording the input a run reads, and playing it back headless
+import collections
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import esper
+import tcod
+
+import components as cmp
+import display as dis
+import ecs
+import input
+import phase
+import save
+
+VERSION = 1
+
+
+class Finished(Exception):
+    """the recording ran out, or we got to the turn we were seeking"""
+
+
+def isolate_save(path: str):
+    """recorded runs start without a save to continue, and leave the real one alone"""
+    save.SAVE_PATH = path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class Recorder:
+    """
+    writes down every key the game handles and every modifier or interrupt it checks
+    with the seed, that's everything a replay needs to retrace the run
+    """
+
+    file = None
+
+    @classmethod
+    def start(cls, path: str, seed: int | None = None):
+        seed = random.getrandbits(64) if seed is None else seed
+        random.seed(seed)
+        isolate_save(f"{path}.db")
+        cls.file = open(path, "w", buffering=1)  # line buffered, so a crash keeps it
+        cls.note("start", {"version": VERSION, "seed": seed})
+        input.Commands.recorder = cls
+
+    @classmethod
+    def note(cls, kind: str, value):
+        cls.file.write(json.dumps([kind, value]) + "\n")
+
+
+class Playback:
+    """stands in for input.Keyboard, answering from a recording"""
+
+    keys: collections.deque = collections.deque()
+    modifiers: collections.deque = collections.deque()
+    halts: collections.deque = collections.deque()
+    until: int | None = None
+
+    @classmethod
+    def load(cls, path: str, until: int | None = None) -> int:
+        """read a recording, returns its seed"""
+        streams = {"key": cls.keys, "held": cls.modifiers, "halt": cls.halts}
+        with open(path) as file:
+            (kind, header), *notes = [json.loads(line) for line in file]
+        if kind != "start" or header["version"] != VERSION:
+            raise ValueError(f"{path} isn't a version {VERSION} recording")
+        for kind, value in notes:
+            streams[kind].append(value)
+        cls.until = until
+        return header["seed"]
+
+    @staticmethod
+    def next(stream: collections.deque):
+        if not stream:
+            raise Finished
+        return stream.popleft()
+
+    @classmethod
+    def events(cls):
+        if cls.until is not None and ecs.get_meta().turn >= cls.until:
+            raise Finished
+        sym = tcod.event.KeySym(cls.next(cls.keys))
+        return [tcod.event.KeyDown(0, sym, 0)]
+
+    @classmethod
+    def held(cls, key: input.Input) -> bool:
+        return cls.next(cls.modifiers)
+
+    @classmethod
+    def interrupted(cls) -> bool:
+        return cls.next(cls.halts)
+
+
+class Headless:
+    """stands in for the tcod context, nothing gets shown"""
+
+    sdl_window = None
+
+    def present(self, console, **kwargs):
+        pass
+
+
+def play(path: str, until: int | None = None) -> dict:
+    """
+    run a recording as fast as it goes, stopping early at turn `until`
+    returns where the run ended up, to compare against an earlier replay
+    """
+    seed = Playback.load(path, until)
+    isolate_save(os.path.join(tempfile.mkdtemp(), "replay.db"))
+    random.seed(seed)
+
+    dis.Glyph = dis.remap_glyphs()
+    width = dis.CONSOLE_WIDTH // dis.TILE_SIZE
+    height = dis.CONSOLE_HEIGHT // dis.TILE_SIZE
+    console = tcod.console.Console(width, height, order="F")
+    input.Commands.source = Playback
+    input.Commands.fast_forward = True
+
+    began = time.perf_counter()
+    phase.start(Headless(), console)
+    try:
+        phase.run()
+    except (Finished, SystemExit):
+        pass
+    finally:
+        save.Writer.flush()
+    took = time.perf_counter() - began
+
+    turn = ecs.get_meta().turn
+    result = {"turn": turn, "seconds": round(took, 3)}
+    result["turns/s"] = round(turn / took, 1) if took else None
+    game_meta = ecs.Query(cmp.GameMeta).first()
+    if map_info := esper.try_component(game_meta, cmp.MapInfo):
+        result["depth"] = map_info.depth
+    for _, (_, pos, hp) in ecs.Query(cmp.Player, cmp.Position, cmp.Health):
+        result["player"] = pos.as_tuple
+        result["hp"] = hp.current
+    result["rng"] = f"{hash(random.getstate()[1]) & 0xFFFFFFFF:08x}"
+    return result
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    path, *turn = sys.argv[1:]
+    for key, value in play(path, int(turn[0]) if turn else None).items():
+        print(f"{key}: {value}")
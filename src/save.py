@@ -0,0 +1,252 @@
+# persisting the run to a sqlite db
+import itertools
+import os
+import pickle
+import queue
+import random
+import sqlite3
+import threading
+
+import esper
+
+import components as cmp
+import ecs
+import event
+import location
+
+SAVE_PATH = "maleficer.db"
+VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+CREATE TABLE IF NOT EXISTS entities (id INTEGER PRIMARY KEY, components BLOB);
+"""
+
+
+def connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(SAVE_PATH)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class Writer:
+    """
+    a background thread that applies each turn's changes to the db
+    the turn loop only pickles what was marked dirty, it never waits on disk
+    """
+
+    jobs: queue.Queue = queue.Queue()
+    thread: threading.Thread | None = None
+    # what the db will hold once the queue drains, to diff the next turn against
+    entities: dict[int, bytes] = {}
+    meta: dict[str, bytes] = {}
+    next_entity = 0  # ids from here on were made after the last save
+    error: str | None = None  # the thread can't touch the log, autosave reports it
+
+    @classmethod
+    def submit(cls, job: tuple):
+        if cls.thread is None or not cls.thread.is_alive():
+            cls.thread = threading.Thread(target=cls._run, daemon=True)
+            cls.thread.start()
+        cls.jobs.put(job)
+
+    @classmethod
+    def flush(cls):
+        """block until everything queued is on disk"""
+        if cls.thread is not None and cls.thread.is_alive():
+            cls.jobs.join()
+
+    @classmethod
+    def _run(cls):
+        conn = connect()
+        while True:
+            kind, *args = cls.jobs.get()
+            try:
+                with conn:
+                    if kind == "write":
+                        cls._write(conn, *args)
+                    elif kind == "wipe":
+                        conn.execute("DELETE FROM entities")
+                        conn.execute("DELETE FROM meta")
+            except sqlite3.Error as e:
+                cls.error = str(e)
+            finally:
+                cls.jobs.task_done()
+
+    @classmethod
+    def _write(cls, conn, changed: dict, removed: list, meta: dict):
+        conn.executemany(
+            "INSERT OR REPLACE INTO entities VALUES (?, ?)", changed.items()
+        )
+        conn.executemany("DELETE FROM entities WHERE id = ?", [(e,) for e in removed])
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", meta.items())
+
+
+def unsaved_types() -> tuple:
+    """menus and per-session handles get rebuilt at startup, so they're not saved"""
+    # not a module constant, components imports us through phase
+    return (
+        cmp.GameMeta,
+        cmp.Crosshair,
+        cmp.MainMenu,
+        cmp.StartMenu,
+        cmp.GameOverMenu,
+        cmp.InventoryMenu,
+        cmp.MenuSelection,
+        cmp.MenuItem,
+    )
+
+
+def unsaved_entities() -> set[int]:
+    cmp_db = esper._components
+    unsaved = set().union(*(cmp_db.get(c, set()) for c in unsaved_types()))
+    return unsaved | esper._dead_entities
+
+
+def saved_entities(known: dict[int, bytes]) -> dict[int, bytes]:
+    """
+    pickle every entity, reusing known bytes for plain floor and wall cells
+    those never change in place, breaking or digging one makes a new entity
+    """
+    unsaved = unsaved_entities()
+    static = ecs.static_cells()
+
+    saved = {}
+    for entity, components in esper._entities.items():
+        if entity in unsaved:
+            continue
+        if entity in static and entity in known:
+            saved[entity] = known[entity]
+        else:
+            saved[entity] = pickle.dumps(tuple(components.values()))
+    return saved
+
+
+def dirty_entities(touched: set[int]) -> tuple[dict[int, bytes], list[int]]:
+    """pickle just the touched entities, and say which of them are gone"""
+    unsaved = unsaved_entities()
+    changed, removed = {}, []
+    for entity in touched:
+        if entity in unsaved or entity not in esper._entities:
+            if entity in Writer.entities:
+                removed.append(entity)
+            continue
+        saved = pickle.dumps(tuple(esper._entities[entity].values()))
+        if Writer.entities.get(entity) != saved:
+            changed[entity] = saved
+    return changed, removed
+
+
+def saved_meta(keys: set[str] | None) -> dict[str, bytes]:
+    """pickle the given meta keys, or all of them for None"""
+    game_meta = ecs.Query(cmp.GameMeta).first()
+    board = ecs.get_meta().board
+    meta = {
+        "version": lambda: VERSION,
+        "map_info": lambda: esper.component_for_entity(game_meta, cmp.MapInfo),
+        "cells": board.cell_ids,
+        "explored": lambda: board.explored,
+        "remembered": lambda: board.remembered,
+        "log": lambda: (list(event.Log.messages), event.Log.curr_len),
+        "rng": random.getstate,
+        "next_level": lambda: (location.NextLevel.depth, location.NextLevel.seed),
+        "levels": lambda: (location.Levels.parked, location.Levels.top),
+        "next_entity": ecs.unused_entity,
+    }
+    keys = meta.keys() if keys is None else keys
+    return {key: pickle.dumps(meta[key]()) for key in keys}
+
+
+def autosave():
+    """queue whatever was marked dirty since the last save"""
+    if not esper.get_component(cmp.Player):
+        return
+    if Writer.error:
+        event.Log.append(f"autosave failed: {Writer.error}")
+        Writer.error = None
+    event.Log.flush()
+
+    upcoming = ecs.next_entity()
+    if ecs.Dirty.everything:
+        entities = saved_entities(Writer.entities)
+        changed = {e: b for e, b in entities.items() if Writer.entities.get(e) != b}
+        removed = [e for e in Writer.entities if e not in entities]
+        meta = saved_meta(None)
+    else:
+        touched = ecs.Dirty.entities.union(range(Writer.next_entity, upcoming))
+        changed, removed = dirty_entities(touched)
+        # the rng moves nearly every turn, and both are tiny
+        meta = saved_meta(ecs.Dirty.meta | {"rng", "next_entity"})
+    ecs.Dirty.clear()
+
+    meta = {k: v for k, v in meta.items() if Writer.meta.get(k) != v}
+    Writer.entities.update(changed)
+    for entity in removed:
+        del Writer.entities[entity]
+    Writer.meta.update(meta)
+    Writer.next_entity = upcoming
+    Writer.submit(("write", changed, removed, meta))
+
+
+def delete():
+    """the run is over"""
+    Writer.entities, Writer.meta = {}, {}
+    ecs.Dirty.mark_all()
+    Writer.submit(("wipe",))
+
+
+def exists() -> bool:
+    if not os.path.exists(SAVE_PATH):
+        return False
+    Writer.flush()
+    with connect() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    return row is not None and pickle.loads(row[0]) == VERSION
+
+
+def load():
+    """rebuild the saved run into the current world"""
+    Writer.flush()
+    with connect() as conn:
+        entity_rows = dict(conn.execute("SELECT id, components FROM entities"))
+        meta_rows = dict(conn.execute("SELECT key, value FROM meta"))
+    meta = {key: pickle.loads(value) for key, value in meta_rows.items()}
+
+    # saved entities keep their ids, since components and the board refer to them.
+    # session entities are only ever found by query, so those can make room
+    next_free = max([meta["next_entity"], *esper._entities]) + 1
+    esper._entity_count = itertools.count(next_free)
+    for entity in entity_rows.keys() & esper._entities.keys():
+        components = esper.components_for_entity(entity)
+        esper.delete_entity(entity, immediate=True)
+        esper.create_entity(*components)
+    next_free = next(esper._entity_count)
+
+    for entity in sorted(entity_rows):
+        esper._entity_count = itertools.count(entity)
+        esper.create_entity(*pickle.loads(entity_rows[entity]))
+    esper._entity_count = itertools.count(next_free)
+
+    game_meta = ecs.Query(cmp.GameMeta).first()
+    if esper.has_component(game_meta, cmp.MapInfo):
+        esper.remove_component(game_meta, cmp.MapInfo)
+    esper.add_component(game_meta, meta["map_info"])
+
+    board = location.Board(*meta["cells"].shape)
+    board.load_cells(meta["cells"])
+    board.explored, board.remembered = meta["explored"], meta["remembered"]
+    ecs.get_meta().board = board
+    board.build_entity_cache()
+
+    xhair = ecs.Query(cmp.Crosshair).first()
+    board.reposition(xhair, *location.player_position())
+
+    event.Log.restore(*meta["log"])
+    random.setstate(meta["rng"])
+    location.NextLevel.prepare(*meta["next_level"])
+    location.Levels.parked, location.Levels.top = meta.get("levels", ({}, 0))
+
+    Writer.entities = entity_rows
+    Writer.meta = meta_rows
+    Writer.next_entity = ecs.next_entity()
+    ecs.Dirty.clear()
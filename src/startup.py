@@ -0,0 +1,78 @@
+# launch timing. set MALEFICER_PROFILE=1 to print where time to main menu goes
+import builtins
+import os
+import sys
+import time
+
+ENABLED = bool(os.environ.get("MALEFICER_PROFILE"))
+
+
+class Startup:
+    start = time.perf_counter()
+    marks: list[tuple[str, float]] = []
+    imports: dict[str, float] = {}  # top level module -> seconds, children included
+    real_import = builtins.__import__
+    reported = False
+
+    @classmethod
+    def mark(cls, label: str):
+        if ENABLED:
+            cls.marks.append((label, time.perf_counter()))
+
+    @classmethod
+    def report(cls):
+        if not ENABLED or cls.reported:
+            return
+        cls.reported = True
+        builtins.__import__ = cls.real_import
+        print("startup:")
+        last = cls.start
+        for label, at in cls.marks:
+            print(f"  {label:<24}{(at - last) * 1000:8.1f}ms")
+            last = at
+        print(f"  {'total':<24}{(last - cls.start) * 1000:8.1f}ms")
+        print("slowest imports:")
+        slowest = sorted(cls.imports.items(), key=lambda kv: kv[1], reverse=True)
+        for name, took in slowest[:12]:
+            print(f"  {name:<24}{took * 1000:8.1f}ms")
+
+
+def track_imports():
+    """time each module's first import, nested imports count toward the outermost"""
+    real_import = Startup.real_import
+    depth = 0
+
+    def timed_import(name, *args, **kwargs):
+        nonlocal depth
+        if depth or name in sys.modules:
+            depth += 1
+            try:
+                return real_import(name, *args, **kwargs)
+            finally:
+                depth -= 1
+        depth += 1
+        began = time.perf_counter()
+        try:
+            return real_import(name, *args, **kwargs)
+        finally:
+            depth -= 1
+            Startup.imports[name] = time.perf_counter() - began
+
+    builtins.__import__ = timed_import
+
+
+def first_frame(present):
+    """wrap context.present, the first call finishes the report"""
+
+    def timed_present(*args, **kwargs):
+        result = present(*args, **kwargs)
+        if not Startup.reported:
+            Startup.mark("first frame")
+            Startup.report()
+        return result
+
+    return timed_present
+
+
+if ENABLED:
+    track_imports()
@@ -0,0 +1,63 @@
+# numbers for the debug overlay, toggled in game with the DEBUG key
+import collections
+import time
+
+import esper
+
+
+class Stats:
+    """timings and counters behind the overlay, collected whether or not it's shown"""
+
+    shown = False
+    frames: collections.deque = collections.deque(maxlen=60)  # when each present ran
+    current: collections.Counter = collections.Counter()  # seconds per processor
+    last_turn: collections.Counter = collections.Counter()
+    counts: collections.Counter = collections.Counter()  # fov, path and area recomputes
+    queries = 0  # ecs.Query built this turn
+    last_queries = 0
+
+    @classmethod
+    def frame(cls):
+        cls.frames.append(time.perf_counter())
+
+    @classmethod
+    def timed(cls, name: str, took: float):
+        cls.current[name] += took
+
+    @classmethod
+    def end_turn(cls):
+        cls.last_turn, cls.current = cls.current, collections.Counter()
+        cls.last_queries, cls.queries = cls.queries, 0
+
+    @classmethod
+    def count(cls, what: str):
+        cls.counts[what] += 1
+
+    @classmethod
+    def toggle(cls):
+        cls.shown = not cls.shown
+
+    @classmethod
+    def fps(cls) -> float:
+        if len(cls.frames) < 2:
+            return 0.0
+        return (len(cls.frames) - 1) / (cls.frames[-1] - cls.frames[0])
+
+    @classmethod
+    def lines(cls, height: int) -> list[str]:
+        """the overlay, as lines for the side panel"""
+        lines = [f"fps {cls.fps():.1f}"]
+        total = sum(cls.last_turn.values())
+        lines.append(f"last turn {total * 1000:.1f}ms")
+        for name, took in cls.last_turn.most_common():
+            lines.append(f" {name[:15]:<15}{took * 1000:7.1f}ms")
+
+        lines.append(f"queries {cls.last_queries}")
+        counts = cls.counts
+        lines.append(f"fov {counts['fov']} path {counts['path']} area {counts['area']}")
+
+        lines.append(f"entities {len(esper._entities)}")
+        sizes = {c.__qualname__: len(ents) for c, ents in esper._components.items()}
+        for name, size in sorted(sizes.items(), key=lambda kv: kv[1], reverse=True):
+            lines.append(f" {name[:19]:<19}{size:5}")
+        return lines[:height]